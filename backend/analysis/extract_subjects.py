@@ -11,10 +11,6 @@ import os
 import logging
 from pathlib import Path
 
-# Set up gevent for Cassandra driver (Python 3.13 compatibility)
-import gevent.monkey
-gevent.monkey.patch_all()
-
 # Add app to path
 sys.path.insert(0, str(Path(__file__).parent))
 
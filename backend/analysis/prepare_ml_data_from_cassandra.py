@@ -19,7 +19,9 @@ import sys
 
 # Add parent directory to import subject prediction service
 sys.path.append(str(Path(__file__).parent.parent))
-from app.services.subject_prediction_service import SUBJECT_PREREQUISITES, GRADE_POINTS
+from app.services.subject_prediction_service import (
+    SUBJECT_PREREQUISITES, GRADE_POINTS, PASSING_GRADES, FAILING_GRADES
+)
 
 
 def load_data(data_dir):
@@ -183,8 +185,7 @@ def calculate_student_features(student_id, all_subjects_df, before_date):
     avg_overall = before_subjects['overallpercentage'].mean()
     
     # Fail count
-    failing_grades = ['D+', 'D', 'D-', 'E', 'F', 'F*']
-    num_fails = before_subjects['grade'].isin(failing_grades).sum()
+    num_fails = before_subjects['grade'].isin(FAILING_GRADES).sum()
     fail_rate = num_fails / len(before_subjects) if len(before_subjects) > 0 else 0.0
     
     return {
@@ -211,8 +212,7 @@ def calculate_subject_cohort_features(subject_code, all_subjects_df):
         }
     
     # Pass rate (C or better)
-    passing_grades = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C']
-    pass_rate = subject_data['grade'].isin(passing_grades).sum() / len(subject_data)
+    pass_rate = subject_data['grade'].isin(PASSING_GRADES).sum() / len(subject_data)
     
     # Average scores
     avg_score = subject_data['overallpercentage'].mean()
@@ -255,8 +255,7 @@ def engineer_features(students_df, subjects_df):
         student_info = students_df[students_df['id'] == student_id].iloc[0] if len(students_df[students_df['id'] == student_id]) > 0 else None
         
         # Target variable: Did student pass? (C or better)
-        passing_grades = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C']
-        passed = 1 if row['grade'] in passing_grades else 0
+        passed = 1 if row['grade'] in PASSING_GRADES else 0
         
         # Get grade points
         grade_points = GRADE_POINTS.get(row['grade'], 0.0)
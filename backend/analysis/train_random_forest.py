@@ -180,7 +180,7 @@ def evaluate_model(model, X_train, X_test, y_train, y_test, feature_columns):
     return feature_importance
 
 
-def save_model(model, label_encoders, feature_columns, feature_importance, output_dir):
+def save_model(model, label_encoders, feature_columns, feature_importance, test_index, output_dir):
     """Save trained model and metadata"""
     print("\n💾 Saving model and metadata...")
     
@@ -194,6 +194,11 @@ def save_model(model, label_encoders, feature_columns, feature_importance, outpu
     joblib.dump(label_encoders, encoders_path)
     print(f"✓ Label encoders saved: {encoders_path}")
     
+    # Save test-set row positions so evaluation can rebuild the split without re-running it
+    test_idx_path = output_dir / 'test_idx.npy'
+    np.save(test_idx_path, np.asarray(test_index, dtype=np.int32))
+    print(f"✓ Test split saved: {test_idx_path}")
+    
     # Save feature metadata
     metadata = {
         'feature_columns': feature_columns,
@@ -236,7 +241,7 @@ def main():
     feature_importance = evaluate_model(model, X_train, X_test, y_train, y_test, feature_columns)
     
     # Save model
-    save_model(model, label_encoders, feature_columns, feature_importance, model_dir)
+    save_model(model, label_encoders, feature_columns, feature_importance, X_test.index, model_dir)
     
     print("\n" + "="*70)
     print("✅ TRAINING COMPLETE!")
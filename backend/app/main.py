@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
+import os
 import sys
 from app.config import settings
 from app.routes import auth, student_stats, health, catalogue
@@ -51,6 +52,12 @@ async def startup_event():
     """Initialize services on startup"""
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"Connecting to Cassandra at {settings.CASSANDRA_HOST}:{settings.CASSANDRA_PORT}")
+    # Importing the ML service loads and warms the model here when PF_EAGER_ML=1
+    from app.services import ml_prediction_service  # noqa: F401
+    if os.environ.get("PF_EAGER_ML") == "1":
+        # Build the cohort aggregates now rather than inside the first prediction request
+        from app.services.subject_prediction_service import get_prediction_service
+        get_prediction_service().cohort_stats
 
 
 @app.on_event("shutdown")
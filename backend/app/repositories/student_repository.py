@@ -3,7 +3,7 @@ Student Repository for Cassandra schema
 Table: students (with 23 columns as per real schema)
 """
 
-from typing import Optional, List
+from typing import Optional, List, Iterator
 from uuid import UUID
 import logging
 from app.models import Student, StudentCreate, StudentResponse
@@ -23,6 +23,9 @@ class StudentRepository:
         # Cache for entire student objects (more aggressive)
         self._student_object_cache = {}
         self._cache_timestamps = {}
+        # Short-lived cache for parsed subject entries, keyed by (student_id, dedup, sort_desc)
+        self._subject_entries_cache = {}
+        self._subject_entries_ttl = 60
     
     def _get_prepared_find_by_id(self):
         """Lazy load prepared statement for find_by_id"""
@@ -71,6 +74,14 @@ class StudentRepository:
                 return self._student_object_cache[student_id]
             return None
     
+    def invalidate(self, student_id: int) -> None:
+        """Drop all cached data for a student (call after writes)"""
+        self._student_object_cache.pop(student_id, None)
+        self._cache_timestamps.pop(student_id, None)
+        self._completed_codes_cache.pop(student_id, None)
+        for key in [k for k in self._subject_entries_cache if k[0] == student_id]:
+            self._subject_entries_cache.pop(key, None)
+    
     def find_by_ic(self, ic: str) -> Optional[Student]:
         """Find student by IC number"""
         try:
@@ -97,8 +108,8 @@ class StudentRepository:
                 WHERE programmecode = %s 
                 ALLOW FILTERING
             """
-            result = self.session.execute(query, (programmecode,))
-            return [self._map_row_to_student(row) for row in result]
+            rows = cassandra_service.iter_paged(query, (programmecode,))
+            return [self._map_row_to_student(row) for row in rows]
         except Exception as e:
             logger.error(f"Error finding students by programme: {str(e)}")
             return []
@@ -107,12 +118,28 @@ class StudentRepository:
         """Find all students (with limit)"""
         try:
             query = f"SELECT * FROM {self.keyspace}.students LIMIT %s"
-            result = self.session.execute(query, (limit,))
-            return [self._map_row_to_student(row) for row in result]
+            rows = cassandra_service.iter_paged(query, (limit,))
+            return [self._map_row_to_student(row) for row in rows]
         except Exception as e:
             logger.error(f"Error finding all students: {str(e)}")
             return []
     
+    def iter_all(self, limit: int = 100, fetch_size: int = 100) -> Iterator[Student]:
+        """Lazily iterate students (with limit), fetching `fetch_size` rows per page.
+        The first page is requested eagerly so connection errors surface to the caller.
+        """
+        query = f"SELECT * FROM {self.keyspace}.students LIMIT %s"
+        rows = cassandra_service.iter_paged(query, (limit,), fetch_size=fetch_size)
+        return self._iter_mapped_students(rows)
+    
+    def _iter_mapped_students(self, rows) -> Iterator[Student]:
+        """Map rows to Students, logging and skipping rows that fail to map"""
+        for row in rows:
+            try:
+                yield self._map_row_to_student(row)
+            except Exception as e:
+                logger.warning(f"Skipping student row {getattr(row, 'id', 'unknown')}: {str(e)}")
+    
     def create(self, student_data: StudentCreate) -> Student:
         """Create a new student"""
         try:
@@ -178,6 +205,7 @@ class StudentRepository:
             """
             
             self.session.execute(query, values)
+            self.invalidate(student_id)
             logger.info(f"Updated student: {student_id}")
             return self.find_by_id(student_id)
             
@@ -190,6 +218,7 @@ class StudentRepository:
         try:
             query = f"DELETE FROM {self.keyspace}.students WHERE id = %s"
             self.session.execute(query, (student_id,))
+            self.invalidate(student_id)
             logger.info(f"Deleted student: {student_id}")
             return True
         except Exception as e:
@@ -342,7 +371,27 @@ class StudentRepository:
           courseworkpercentage, status, examyear, exammonth
         Unknown or missing fields are omitted.
         Supports list-of-dicts, JSON string, or CSV formats similar to get_completed_subject_codes.
+        Results are cached for 60 seconds per (student_id, dedup, sort_desc).
         """
+        import time
+
+        key = (student_id, dedup, sort_desc)
+        cached = self._subject_entries_cache.get(key)
+        if cached is not None and time.time() - cached[0] < self._subject_entries_ttl:
+            return cached[1]
+
+        entries = self._load_subject_entries(student_id, dedup=dedup, sort_desc=sort_desc)
+        if entries:
+            self._subject_entries_cache[key] = (time.time(), entries)
+            # Limit cache size
+            if len(self._subject_entries_cache) > 5000:
+                oldest_keys = sorted(self._subject_entries_cache.items(), key=lambda x: x[1][0])[:1000]
+                for k, _ in oldest_keys:
+                    self._subject_entries_cache.pop(k, None)
+        return entries
+
+    def _load_subject_entries(self, student_id: int, *, dedup: bool, sort_desc: bool) -> List[dict]:
+        """Uncached body of get_subject_entries"""
         try:
             student = self.find_by_id(student_id)
             if not student:
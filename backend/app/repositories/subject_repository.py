@@ -51,8 +51,8 @@ class SubjectRepository:
                 WHERE subjectcode = %s 
                 ALLOW FILTERING
             """
-            result = self.session.execute(query, (subjectcode,))
-            return [self._map_row_to_subject(row) for row in result]
+            rows = cassandra_service.iter_paged(query, (subjectcode,))
+            return [self._map_row_to_subject(row) for row in rows]
         except Exception as e:
             logger.error(f"Error finding subjects by code: {str(e)}")
             return []
@@ -62,8 +62,8 @@ class SubjectRepository:
         try:
             # Use prepared statement with timeout for better performance
             prepared = self._get_prepared_find_by_programme()
-            result = self.session.execute(prepared, (programmecode, limit), timeout=5.0)
-            return [self._map_row_to_subject(row) for row in result]
+            rows = cassandra_service.iter_paged(prepared, (programmecode, limit), timeout=5.0)
+            return [self._map_row_to_subject(row) for row in rows]
         except Exception as e:
             logger.error(f"Error finding subjects by programme: {str(e)}")
             return []
@@ -72,8 +72,8 @@ class SubjectRepository:
         """Find all subjects (with limit)"""
         try:
             query = f"SELECT * FROM {self.keyspace}.subjects LIMIT %s"
-            result = self.session.execute(query, (limit,))
-            return [self._map_row_to_subject(row) for row in result]
+            rows = cassandra_service.iter_paged(query, (limit,))
+            return [self._map_row_to_subject(row) for row in rows]
         except Exception as e:
             logger.error(f"Error finding all subjects: {str(e)}")
             return []
@@ -3,8 +3,12 @@ Student stats routes using students/subjects tables
 """
 
 from fastapi import APIRouter, HTTPException, status, Depends, Header
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from typing import Optional, Iterable, Iterator
 import logging
+import numpy as np
+import orjson
+import pandas as pd
 from app.models import StudentResponse, SubjectResponse, StudentWithSubjects
 
 logger = logging.getLogger(__name__)
@@ -23,41 +27,99 @@ def get_program_name(program_code: str) -> str:
     return program_map.get(program_code.upper() if program_code else '', program_code or '')
 
 
-@router.get("/list", response_model=list[StudentResponse])
+_STUDENT_RESPONSE_FIELDS = tuple(StudentResponse.model_fields)
+
+
+def _stream_students(students: Iterable) -> Iterator[bytes]:
+    """Yield a JSON array of StudentResponse-shaped objects one row at a time.
+    Headers are already sent by the time later pages are fetched, so errors past
+    this point are logged and the array is closed with the rows streamed so far.
+    """
+    yield b'['
+    first = True
+    try:
+        for s in students:
+            try:
+                row = {name: getattr(s, name) for name in _STUDENT_RESPONSE_FIELDS}
+                row['program'] = s.program or get_program_name(s.programmecode)
+                chunk = orjson.dumps(row)
+            except Exception as e:
+                logger.warning(f"Skipping student {getattr(s, 'id', 'unknown')} in list: {e}")
+                continue
+            yield (b'' if first else b',') + chunk
+            first = False
+    except Exception as e:
+        logger.error(f"Cassandra error while streaming students: {e}")
+    yield b']'
+
+
+# StreamingResponse bypasses response_model validation; `responses` keeps the schema in the docs
+@router.get("/list", response_model=None, responses={200: {"model": list[StudentResponse]}})
 async def list_students(limit: int = 10):
     """List students (for testing - shows IC numbers you can use to login)
-    Returns 503 if Cassandra is unavailable.
+    Streams rows from the Cassandra cursor instead of building the full list.
+    Returns 503 if Cassandra is unavailable when the first page is fetched.
     """
     try:
         from app.repositories.student_repository import student_repository
-        students = student_repository.find_all(limit=limit)
+        students = student_repository.iter_all(limit=limit)
     except Exception as e:
         logger.error(f"Cassandra error listing students: {e}")
-        from fastapi import HTTPException
         raise HTTPException(status_code=503, detail="Database unavailable")
 
+    return StreamingResponse(_stream_students(students), media_type="application/json")
+
+
+_SUBJECT_ENTRY_COLUMNS = [
+    'subjectcode', 'subjectname', 'grade', 'overallpercentage', 'attendancepercentage',
+    'courseworkpercentage', 'status', 'examyear', 'exammonth'
+]
+_STR_COLUMNS = ['subjectcode', 'subjectname', 'grade', 'status']
+_FLOAT_COLUMNS = ['overallpercentage', 'attendancepercentage', 'courseworkpercentage']
+_INT_COLUMNS = ['examyear', 'exammonth']
+
+
+def _subject_entries_to_frame(entries: list[dict]) -> pd.DataFrame:
+    """Load normalized subject entries into a frame with coerced numeric columns.
+    Entries with a non-string text field are dropped (as SubjectResponse validation would);
+    the frame keeps each entry's original position as its index.
+    """
+    df = pd.DataFrame(entries, dtype=object).reindex(columns=_SUBJECT_ENTRY_COLUMNS)
+    valid = pd.Series(True, index=df.index)
+    for col in _STR_COLUMNS:
+        valid &= df[col].map(lambda v: v is None or isinstance(v, str) or pd.isna(v))
+    if not valid.all():
+        logger.warning(f"Skipping {int((~valid).sum())} subject entries with non-string text fields")
+        df = df[valid]
+    for col in _FLOAT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    for col in _INT_COLUMNS:
+        values = pd.to_numeric(df[col], errors='coerce').astype(float)
+        # inf or values beyond int64 cannot be cast to Int64; treat them as missing
+        values = values.where(np.isfinite(values) & (values.abs() < 2 ** 63))
+        df[col] = values.round().astype('Int64')
+    return df
+
+
+def _subject_frame_to_responses(df: pd.DataFrame, programmecode: Optional[str]) -> list[SubjectResponse]:
+    """Map a normalized subject frame to SubjectResponse objects in one vectorized pass"""
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    # Values are already coerced in _subject_entries_to_frame, so skip per-field validation
     return [
-        StudentResponse(
-            id=s.id,
-            ic=s.ic,
-            name=s.name,
-            programmecode=s.programmecode,
-            program=s.program or get_program_name(s.programmecode),
-            overallcgpa=s.overallcgpa,
-            overallcavg=s.overallcavg,
-            year=s.year,
-            sem=s.sem,
-            status=s.status,
-            graduated=s.graduated,
-            cohort=s.cohort,
-            gender=s.gender,
-            race=s.race,
-            country=s.country,
-            yearonecgpa=s.yearonecgpa
-        ) for s in students
+        SubjectResponse.model_construct(id=int(idx) + 1, programmecode=programmecode, **r)
+        for idx, r in zip(df.index, records)
     ]
 
 
+def _nan_column_means(values: np.ndarray) -> list[Optional[float]]:
+    """Column means ignoring NaN; None for columns with no values"""
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+    sums = np.nansum(values, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+    return [None if np.isnan(m) else float(m) for m in means]
+
+
 def get_current_user(authorization: Optional[str] = Header(None)):
     """Extract and validate JWT token from Authorization header"""
     from app.services.jwt_service import jwt_service
@@ -127,26 +189,14 @@ async def get_student_subjects(student_id: int, limit: int = 50):
         subject_entries = []
 
     subject_responses = []
+    subject_frame = None
     if subject_entries:
         # Map normalized dicts to SubjectResponse with synthetic IDs
-        for idx, e in enumerate(subject_entries, start=1):
-            try:
-                subject_responses.append(SubjectResponse(
-                    id=idx,
-                    subjectcode=e.get('subjectcode'),
-                    subjectname=e.get('subjectname'),
-                    programmecode=student.programmecode,
-                    grade=e.get('grade'),
-                    overallpercentage=e.get('overallpercentage'),
-                    attendancepercentage=e.get('attendancepercentage'),
-                    courseworkpercentage=e.get('courseworkpercentage'),
-                    status=e.get('status'),
-                    examyear=e.get('examyear'),
-                    exammonth=e.get('exammonth')
-                ))
-            except Exception as ex:
-                logger.warning(f"Error mapping student subject entry: {str(ex)}")
-                continue
+        try:
+            subject_frame = _subject_entries_to_frame(subject_entries)
+            subject_responses = _subject_frame_to_responses(subject_frame, student.programmecode)
+        except Exception as ex:
+            logger.warning(f"Error mapping student subject entries: {str(ex)}")
     else:
         # Fallback: programme-level subjects
         subjects = []
@@ -181,10 +231,13 @@ async def get_student_subjects(student_id: int, limit: int = 50):
     avg_att = None
     avg_pct = None
     if subject_responses:
-        att_values = [s.attendancepercentage for s in subject_responses if s.attendancepercentage is not None]
-        pct_values = [s.overallpercentage for s in subject_responses if s.overallpercentage is not None]
-        avg_att = sum(att_values)/len(att_values) if att_values else None
-        avg_pct = sum(pct_values)/len(pct_values) if pct_values else None
+        if subject_frame is not None:
+            values = subject_frame[['attendancepercentage', 'overallpercentage']].to_numpy(dtype=float)
+        else:
+            values = np.array(
+                [(s.attendancepercentage, s.overallpercentage) for s in subject_responses], dtype=float
+            )
+        avg_att, avg_pct = _nan_column_means(values)
 
     return StudentWithSubjects(
         student=StudentResponse(
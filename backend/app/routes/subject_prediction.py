@@ -6,6 +6,7 @@ prerequisite performance and historical data.
 """
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
+from dataclasses import fields
 from typing import List, Optional, Dict, Any
 
 from ..services.subject_prediction_service import (
@@ -75,33 +76,24 @@ class CohortStatsResponse(BaseModel):
     total_students: int
 
 
+# Field names are resolved once at import; the service's dataclasses already hold
+# validated values, so responses are built with model_construct (no re-validation)
+_PREDICTION_FIELDS = tuple(f.name for f in fields(SubjectPrediction) if f.name != 'prereq_performance')
+_PREREQ_FIELDS = tuple(f.name for f in fields(PrerequisitePerformance))
+
+
 def _convert_prediction(pred: SubjectPrediction) -> SubjectPredictionResponse:
     """Convert dataclass to Pydantic model"""
-    return SubjectPredictionResponse(
-        subject_code=pred.subject_code,
-        subject_name=pred.subject_name,
-        risk_level=pred.risk_level,
-        predicted_success_probability=pred.predicted_success_probability,
-        weighted_prereq_gpa=pred.weighted_prereq_gpa,
-        prereq_performance=[
-            PrerequisitePerformanceResponse(
-                subject_code=p.subject_code,
-                subject_name=p.subject_name,
-                grade=p.grade,
-                grade_points=p.grade_points,
-                weight=p.weight,
-                impact_score=p.impact_score
-            ) for p in pred.prereq_performance
-        ],
-        missing_prereqs=pred.missing_prereqs,
-        recommendation=pred.recommendation,
-        cohort_pass_rate=pred.cohort_pass_rate,
-        cohort_avg_score=pred.cohort_avg_score,
-        ml_probability=pred.ml_probability,
-        ml_confidence=pred.ml_confidence,
-        ml_top_factors=pred.ml_top_factors,
-        prediction_method=pred.prediction_method
-    )
+    data = {name: getattr(pred, name) for name in _PREDICTION_FIELDS}
+    # The service returns tuples; model_construct does not convert them to the declared lists
+    data['missing_prereqs'] = list(pred.missing_prereqs)
+    if pred.ml_top_factors is not None:
+        data['ml_top_factors'] = list(pred.ml_top_factors)
+    data['prereq_performance'] = [
+        PrerequisitePerformanceResponse.model_construct(**{name: getattr(p, name) for name in _PREREQ_FIELDS})
+        for p in pred.prereq_performance
+    ]
+    return SubjectPredictionResponse.model_construct(**data)
 
 
 @router.get("/students/{student_id}/subject/{subject_code}", response_model=SubjectPredictionResponse)
@@ -116,7 +108,7 @@ async def predict_single_subject(student_id: int, subject_code: str):
         raise HTTPException(status_code=503, detail="Data not available")
     
     # Check if student exists
-    if student_id not in service.df['student_id'].values:
+    if not service.has_student(student_id):
         raise HTTPException(status_code=404, detail=f"Student {student_id} not found")
     
     prediction = service.predict_subject_success(student_id, subject_code)
@@ -134,7 +126,7 @@ async def predict_multiple_subjects(student_id: int, request: PredictRequest):
     if service.df is None:
         raise HTTPException(status_code=503, detail="Data not available")
     
-    if student_id not in service.df['student_id'].values:
+    if not service.has_student(student_id):
         raise HTTPException(status_code=404, detail=f"Student {student_id} not found")
     
     if not request.subject_codes:
@@ -0,0 +1,102 @@
+"""
+One-shot Cassandra schema initialisation.
+
+Run once at deploy time (not on every app start):
+    python -m app.scripts.init_cassandra
+"""
+import logging
+import sys
+
+from cassandra.cluster import Session
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def create_tables(session: Session, keyspace: str = settings.CASSANDRA_KEYSPACE):
+    """Create all required tables"""
+    # Students table
+    session.execute(f"""
+        CREATE TABLE IF NOT EXISTS {keyspace}.students (
+            id UUID PRIMARY KEY,
+            student_id TEXT,
+            name TEXT,
+            email TEXT,
+            password_hash TEXT,
+            gpa DOUBLE,
+            semester INT,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP
+        )
+    """)
+    
+    # Courses table
+    session.execute(f"""
+        CREATE TABLE IF NOT EXISTS {keyspace}.courses (
+            id UUID PRIMARY KEY,
+            course_code TEXT,
+            course_name TEXT,
+            credits INT,
+            difficulty DOUBLE,
+            prerequisites LIST<TEXT>,
+            description TEXT,
+            created_at TIMESTAMP
+        )
+    """)
+    
+    # Enrollments table
+    session.execute(f"""
+        CREATE TABLE IF NOT EXISTS {keyspace}.enrollments (
+            id UUID PRIMARY KEY,
+            student_id UUID,
+            course_id UUID,
+            semester INT,
+            grade TEXT,
+            status TEXT,
+            attendance_rate DOUBLE,
+            enrolled_at TIMESTAMP,
+            completed_at TIMESTAMP
+        )
+    """)
+    
+    # Risk predictions table
+    session.execute(f"""
+        CREATE TABLE IF NOT EXISTS {keyspace}.risk_predictions (
+            id UUID PRIMARY KEY,
+            student_id UUID,
+            course_id UUID,
+            risk_level TEXT,
+            confidence DOUBLE,
+            factors MAP<TEXT, DOUBLE>,
+            recommendations LIST<TEXT>,
+            predicted_grade TEXT,
+            created_at TIMESTAMP
+        )
+    """)
+    
+    logger.info("All tables created or already exist")
+
+
+def main() -> int:
+    """Open a session, create the tables and exit"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    from app.services.cassandra_service import cassandra_service
+    
+    session = cassandra_service.get_session()
+    if session is None:
+        logger.error("Cassandra is unavailable - schema not initialised")
+        return 1
+    
+    try:
+        create_tables(session)
+    except Exception as e:
+        logger.error(f"Could not create tables (may lack permissions): {str(e)}")
+        return 1
+    finally:
+        cassandra_service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,10 @@
 from cassandra.cluster import Cluster, Session, EXEC_PROFILE_DEFAULT, ExecutionProfile
 from cassandra.auth import PlainTextAuthProvider
-from cassandra.query import SimpleStatement
-from cassandra.policies import DCAwareRoundRobinPolicy
-from cassandra.io.geventreactor import GeventConnection
+from cassandra.query import SimpleStatement, PreparedStatement
+from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy
+from cassandra.io.asyncioreactor import AsyncioConnection
 import logging
-from typing import Optional
+from typing import Optional, Iterator, Any
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -40,13 +40,16 @@ class CassandraService:
             else:
                 logger.info("No authentication configured for Cassandra")
             
-            # Create execution profile with load balancing policy
+            # Create execution profile with load balancing policy; token-aware routing sends
+            # bound statements straight to a replica of their partition (no coordinator hop)
             profile = ExecutionProfile(
-                load_balancing_policy=DCAwareRoundRobinPolicy(local_dc=settings.CASSANDRA_DATACENTER),
+                load_balancing_policy=TokenAwarePolicy(
+                    DCAwareRoundRobinPolicy(local_dc=settings.CASSANDRA_DATACENTER)
+                ),
                 request_timeout=10
             )
             
-            # Create cluster connection with gevent event loop (Python 3.12+ compatible)
+            # Create cluster connection on the asyncio reactor (no asyncore on Python 3.12+)
             self._cluster = Cluster(
                 contact_points=[settings.CASSANDRA_HOST],
                 port=settings.CASSANDRA_PORT,
@@ -55,7 +58,7 @@ class CassandraService:
                 connect_timeout=10,
                 control_connection_timeout=10,
                 execution_profiles={EXEC_PROFILE_DEFAULT: profile},
-                connection_class=GeventConnection
+                connection_class=AsyncioConnection
             )
             
             # Connect and get session
@@ -65,11 +68,7 @@ class CassandraService:
             logger.info(f"Connecting to keyspace: {settings.CASSANDRA_KEYSPACE}")
             self._session.set_keyspace(settings.CASSANDRA_KEYSPACE)
             
-            # Create tables if they don't exist (if user has permissions)
-            try:
-                self._create_tables()
-            except Exception as e:
-                logger.warning(f"Could not create tables (may already exist or lack permissions): {str(e)}")
+            # Schema is managed out of band: run `python -m app.scripts.init_cassandra` at deploy time
             
             logger.info("Successfully connected to Cassandra")
             
@@ -94,71 +93,6 @@ class CassandraService:
         self._session.execute(query)
         logger.info(f"Keyspace {settings.CASSANDRA_KEYSPACE} created or already exists")
     
-    def _create_tables(self):
-        """Create all required tables"""
-        keyspace = settings.CASSANDRA_KEYSPACE
-        
-        # Students table
-        self._session.execute(f"""
-            CREATE TABLE IF NOT EXISTS {keyspace}.students (
-                id UUID PRIMARY KEY,
-                student_id TEXT,
-                name TEXT,
-                email TEXT,
-                password_hash TEXT,
-                gpa DOUBLE,
-                semester INT,
-                created_at TIMESTAMP,
-                updated_at TIMESTAMP
-            )
-        """)
-        
-        # Courses table
-        self._session.execute(f"""
-            CREATE TABLE IF NOT EXISTS {keyspace}.courses (
-                id UUID PRIMARY KEY,
-                course_code TEXT,
-                course_name TEXT,
-                credits INT,
-                difficulty DOUBLE,
-                prerequisites LIST<TEXT>,
-                description TEXT,
-                created_at TIMESTAMP
-            )
-        """)
-        
-        # Enrollments table
-        self._session.execute(f"""
-            CREATE TABLE IF NOT EXISTS {keyspace}.enrollments (
-                id UUID PRIMARY KEY,
-                student_id UUID,
-                course_id UUID,
-                semester INT,
-                grade TEXT,
-                status TEXT,
-                attendance_rate DOUBLE,
-                enrolled_at TIMESTAMP,
-                completed_at TIMESTAMP
-            )
-        """)
-        
-        # Risk predictions table
-        self._session.execute(f"""
-            CREATE TABLE IF NOT EXISTS {keyspace}.risk_predictions (
-                id UUID PRIMARY KEY,
-                student_id UUID,
-                course_id UUID,
-                risk_level TEXT,
-                confidence DOUBLE,
-                factors MAP<TEXT, DOUBLE>,
-                recommendations LIST<TEXT>,
-                predicted_grade TEXT,
-                created_at TIMESTAMP
-            )
-        """)
-        
-        logger.info("All tables created or already exist")
-    
     def get_session(self) -> Session:
         """Get the Cassandra session"""
         if self._session is None:
@@ -179,6 +113,37 @@ class CassandraService:
             return session.execute_async(query, parameters)
         return session.execute_async(query)
     
+    def iter_paged(self, statement, parameters: tuple = None, fetch_size: int = 500,
+                   timeout: Optional[float] = None) -> Iterator[Any]:
+        """Iterate all rows of a query, prefetching the next page while the current one is consumed.
+
+        `statement` may be a CQL string, a SimpleStatement or a PreparedStatement.
+        The first page is fetched before returning, so query errors are raised here.
+        """
+        session = self.get_session()
+        if isinstance(statement, str):
+            statement = SimpleStatement(statement, fetch_size=fetch_size)
+        elif isinstance(statement, PreparedStatement):
+            statement = statement.bind(parameters or ())
+            statement.fetch_size = fetch_size
+            parameters = None
+        kwargs = {'timeout': timeout} if timeout is not None else {}
+        future = session.execute_async(statement, parameters, **kwargs)
+        return self._iter_pages(future, future.result())
+    
+    @staticmethod
+    def _iter_pages(future, result) -> Iterator[Any]:
+        """Yield rows page by page, requesting page N+1 before handing out page N"""
+        while True:
+            rows = result.current_rows
+            has_more = future.has_more_pages
+            if has_more:
+                future.start_fetching_next_page()
+            yield from rows
+            if not has_more:
+                return
+            result = future.result()
+    
     def close(self):
         """Close the Cassandra connection"""
         if self._cluster:
@@ -5,6 +5,7 @@ Uses trained Random Forest model to predict student success probability.
 Works as a hybrid with the existing rule-based prerequisite algorithm.
 """
 
+import os
 import joblib
 import pandas as pd
 import numpy as np
@@ -12,6 +13,61 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import json
+import threading
+
+# Optional: ONNX Runtime removes scikit-learn's per-call Python overhead for
+# small (single-row) forest inference. Falls back to predict_proba if missing.
+try:
+    import onnxruntime as ort
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    from onnx import helper
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+# Feature sources, in the order _fill_rows builds them for each item
+FEATURE_SOURCES = ('student_features', 'prereq_features', 'cohort_features', 'derived')
+
+# feature column -> (index into FEATURE_SOURCES, default when the key is missing)
+FEATURE_DEFAULTS = {
+    # Student performance features
+    'num_subjects_completed': (0, 0),
+    'current_gpa': (0, 0.0),
+    'gpa_trend_last_3': (0, 0.0),
+    'avg_coursework_percentage': (0, 0.0),
+    'avg_overall_percentage': (0, 0.0),
+    'num_fails': (0, 0),
+    'fail_rate': (0, 0.0),
+    
+    # Prerequisite features
+    'num_prerequisites': (1, 0),
+    'num_prerequisites_completed': (1, 0),
+    'num_prerequisites_missing': (1, 0),
+    'avg_prereq_grade_points': (1, 0.0),
+    'weighted_prereq_gpa': (1, 0.0),
+    'min_prereq_grade': (1, 0.0),
+    'max_prereq_grade': (1, 0.0),
+    
+    # Subject cohort features
+    'subject_pass_rate': (2, 0.5),
+    'subject_avg_score': (2, 50.0),
+    'subject_avg_gpa': (2, 2.0),
+    'subject_total_students': (2, 0),
+    
+    # Encoded categorical + additional features, derived per item
+    'programme_code_encoded': (3, 0),
+    'gender_encoded': (3, 0),
+    'subject_code_encoded': (3, 0),
+    'cohort': (3, 0),
+    'has_financial_aid': (3, 0),
+}
+
+# Batch-size buckets with preallocated ONNX Runtime I/O buffers; larger batches use session.run
+ORT_BATCH_BUCKETS = (1, 4, 16, 64)
+
+# Bump when the ONNX export changes so stale cached .onnx files are ignored
+ONNX_CACHE_VERSION = 2
 
 
 @dataclass
@@ -31,6 +87,17 @@ class MLPredictionService:
         self.label_encoders = None
         self.feature_columns = None
         self.feature_importance = None
+        self._enc_maps: Dict[str, Dict[str, int]] = {}
+        self._col_idx: Dict[str, int] = {}
+        self._n_feat = 0
+        self._row_plan: List[Tuple[str, int, float]] = []
+        self._imp_vec: Optional[np.ndarray] = None
+        self._display_names: List[str] = []
+        self.ort_session = None
+        self._ort_input = None
+        self._ort_outputs: List[str] = []
+        # The session is shared; I/O bindings and their buffers are per thread
+        self._ort_local = threading.local()
         self._load_model()
     
     def _load_model(self):
@@ -47,6 +114,11 @@ class MLPredictionService:
             encoders_path = model_dir / 'label_encoders.pkl'
             if encoders_path.exists():
                 self.label_encoders = joblib.load(encoders_path)
+                # class -> code lookups, equivalent to LabelEncoder.transform for one value
+                self._enc_maps = {
+                    name: {c: i for i, c in enumerate(le.classes_.tolist())}
+                    for name, le in self.label_encoders.items()
+                }
             
             # Load metadata
             metadata_path = model_dir / 'model_metadata.json'
@@ -54,10 +126,21 @@ class MLPredictionService:
                 with open(metadata_path, 'r') as f:
                     metadata = json.load(f)
                     self.feature_columns = metadata.get('feature_columns', [])
+                    self._col_idx = {c: i for i, c in enumerate(self.feature_columns)}
+                    self._n_feat = len(self.feature_columns)
+                    # (name, source index, default) per column; unknown columns read as 0
+                    self._row_plan = [
+                        (c,) + FEATURE_DEFAULTS.get(c, (3, 0)) for c in self.feature_columns
+                    ]
                     self.feature_importance = {
                         item['feature']: item['importance'] 
                         for item in metadata.get('feature_importance', [])
                     }
+                    # Importances / display names aligned with feature_columns for _get_top_factors
+                    self._imp_vec = np.array(
+                        [self.feature_importance.get(c, 0.0) for c in self.feature_columns], dtype=np.float64
+                    )
+                    self._display_names = [self._format_feature_name(c) for c in self.feature_columns]
             
             if self.model is not None:
                 # CRITICAL FIX: Disable parallel processing to prevent hanging
@@ -68,6 +151,7 @@ class MLPredictionService:
                     print("✓ ML Model loaded successfully (single-threaded mode)")
                 else:
                     print("✓ ML Model loaded successfully")
+                self._load_onnx_session(model_path)
             else:
                 print("⚠ ML Model not found - predictions will use rule-based only")
                 
@@ -75,6 +159,133 @@ class MLPredictionService:
             print(f"⚠ Error loading ML model: {e}")
             self.model = None
     
+    def _load_onnx_session(self, model_path: Path):
+        """Export the forest to ONNX (cached next to the pickle) and open an inference session"""
+        if not ONNX_AVAILABLE or not self.feature_columns:
+            return
+        
+        try:
+            onnx_path = model_path.with_suffix(f'.v{ONNX_CACHE_VERSION}.onnx')
+            if onnx_path.exists() and onnx_path.stat().st_mtime >= model_path.stat().st_mtime:
+                onnx_model = onnx_path.read_bytes()
+            else:
+                onx = convert_sklearn(
+                    self.model,
+                    initial_types=[('input', FloatTensorType([None, len(self.feature_columns)]))],
+                    options={id(self.model): {'zipmap': False}}
+                )
+                self._carry_missing_routing(onx)
+                onnx_model = onx.SerializeToString()
+                try:
+                    onnx_path.write_bytes(onnx_model)
+                except OSError:
+                    pass  # Read-only model dir: just convert again next start
+            
+            so = ort.SessionOptions()
+            so.intra_op_num_threads = 1
+            self.ort_session = ort.InferenceSession(onnx_model, sess_options=so, providers=['CPUExecutionProvider'])
+            self._ort_input = self.ort_session.get_inputs()[0].name
+            self._ort_outputs = [o.name for o in self.ort_session.get_outputs()]
+            if not self._onnx_matches_sklearn():
+                print("⚠ ONNX export disagrees with scikit-learn, using scikit-learn inference")
+                self.ort_session = None
+                return
+            print("✓ ONNX Runtime session ready for ML inference")
+        except Exception as e:
+            print(f"⚠ ONNX export failed, using scikit-learn inference: {e}")
+            self.ort_session = None
+    
+    def _carry_missing_routing(self, onx):
+        """Copy each split's learned NaN direction (tree_.missing_go_to_left) into the ONNX trees"""
+        trees = [est.tree_ for est in self.model.estimators_]
+        go_left = np.concatenate([t.missing_go_to_left for t in trees]).astype(np.int64)
+        offsets = np.cumsum([0] + [t.node_count for t in trees[:-1]])
+        for node in onx.graph.node:
+            if node.op_type != 'TreeEnsembleClassifier':
+                continue
+            attrs = {a.name: a for a in node.attribute}
+            tree_ids = np.asarray(attrs['nodes_treeids'].ints)
+            node_ids = np.asarray(attrs['nodes_nodeids'].ints)
+            # BRANCH_LEQ's true branch is the left child, so "missing goes left" is "tracks true"
+            tracks = go_left[offsets[tree_ids] + node_ids].tolist()
+            attr = attrs.get('nodes_missing_value_tracks_true')
+            if attr is None:
+                node.attribute.append(helper.make_attribute('nodes_missing_value_tracks_true', tracks))
+            else:
+                del attr.ints[:]
+                attr.ints.extend(tracks)
+    
+    def _onnx_matches_sklearn(self, n_rows: int = 256) -> bool:
+        """Compare ONNX and scikit-learn probabilities on rows near the split thresholds, with NaNs mixed in"""
+        rng = np.random.default_rng(0)
+        X = np.zeros((n_rows, self._n_feat), dtype=np.float32)
+        for f in range(self._n_feat):
+            thr = np.concatenate([e.tree_.threshold[e.tree_.feature == f] for e in self.model.estimators_])
+            if thr.size:
+                # Step clearly off the threshold so float32 rounding cannot pick the branch
+                step = np.maximum(np.abs(thr) * 1e-4, 1e-3)
+                pick = rng.integers(0, thr.size, n_rows)
+                X[:, f] = thr[pick] + rng.choice([-1.0, 1.0], n_rows) * step[pick]
+        X[rng.random(X.shape) < 0.3] = np.nan
+        onnx_proba = self.ort_session.run(None, {self._ort_input: X})[1]
+        sk_proba = self.model.predict_proba(pd.DataFrame(X, columns=self.feature_columns))
+        return np.allclose(onnx_proba, sk_proba, atol=1e-5)
+    
+    def _predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities for each row of X (ONNX Runtime when available)"""
+        if self.ort_session is not None:
+            # The export carries sklearn's missing-value branches, so NaN rows run here too
+            return self._run_onnx(X)
+        # The forest was fitted on a DataFrame; keep column names to match
+        return self.model.predict_proba(pd.DataFrame(X, columns=self.feature_columns))
+    
+    def _get_binding(self, bucket: int):
+        """Per-thread IOBinding for a batch-size bucket, bound to preallocated numpy buffers"""
+        bindings = getattr(self._ort_local, 'bindings', None)
+        if bindings is None:
+            bindings = self._ort_local.bindings = {}
+        entry = bindings.get(bucket)
+        if entry is None:
+            x_buf = np.zeros((bucket, self._n_feat), dtype=np.float32)
+            label_buf = np.zeros(bucket, dtype=np.int64)
+            proba_buf = np.zeros((bucket, 2), dtype=np.float32)
+            binding = self.ort_session.io_binding()
+            # OrtValues created from numpy share memory with the buffers
+            binding.bind_ortvalue_input(self._ort_input, ort.OrtValue.ortvalue_from_numpy(x_buf))
+            binding.bind_ortvalue_output(self._ort_outputs[0], ort.OrtValue.ortvalue_from_numpy(label_buf))
+            binding.bind_ortvalue_output(self._ort_outputs[1], ort.OrtValue.ortvalue_from_numpy(proba_buf))
+            entry = bindings[bucket] = (binding, x_buf, proba_buf)
+        return entry
+    
+    def _run_onnx(self, X: np.ndarray) -> np.ndarray:
+        """Run the ONNX session, reusing bound buffers when the batch fits a bucket"""
+        n = X.shape[0]
+        bucket = next((b for b in ORT_BATCH_BUCKETS if b >= n), None)
+        if bucket is None:
+            # Outputs are (label, probabilities) since ZipMap is disabled
+            return self.ort_session.run(None, {self._ort_input: X})[1]
+        
+        binding, x_buf, proba_buf = self._get_binding(bucket)
+        x_buf[:n] = X
+        x_buf[n:] = 0.0
+        self.ort_session.run_with_iobinding(binding)
+        # Copy out: the buffer is overwritten by the next call on this thread
+        return proba_buf[:n].copy()
+    
+    def warm_up(self):
+        """Run one dummy inference per backend so the first request skips lazy initialisation"""
+        if not self.is_available():
+            return
+        try:
+            X = np.zeros((1, self._n_feat), dtype=np.float32)
+            if self.ort_session is not None:
+                self._run_onnx(X)
+            else:
+                self.model.predict_proba(pd.DataFrame(X, columns=self.feature_columns))
+            print("✓ ML Model warmed up")
+        except Exception as e:
+            print(f"⚠ ML warm-up failed: {e}")
+    
     def is_available(self) -> bool:
         """Check if ML model is loaded and available"""
         return self.model is not None
@@ -89,79 +300,57 @@ class MLPredictionService:
         gender: str = '',
         cohort: int = 0,
         has_financial_aid: bool = False
-    ) -> Optional[pd.DataFrame]:
-        """Prepare features for ML prediction"""
+    ) -> Optional[np.ndarray]:
+        """Prepare a (1, n_features) float32 row in `feature_columns` order for ML prediction"""
         
         if not self.is_available():
             return None
         
         try:
-            # Encode categorical features
-            subject_code_encoded = 0
-            if 'subject_code' in self.label_encoders:
-                try:
-                    subject_code_encoded = self.label_encoders['subject_code'].transform([subject_code])[0]
-                except:
-                    subject_code_encoded = -1  # Unknown subject
-            
-            programme_code_encoded = 0
-            if 'programme_code' in self.label_encoders and programme_code:
-                try:
-                    programme_code_encoded = self.label_encoders['programme_code'].transform([programme_code])[0]
-                except:
-                    programme_code_encoded = -1  # Unknown programme
-            
-            gender_encoded = 0
-            if 'gender' in self.label_encoders and gender:
-                try:
-                    gender_encoded = self.label_encoders['gender'].transform([gender])[0]
-                except:
-                    gender_encoded = -1  # Unknown gender
-            
-            # Create feature dictionary
-            features = {
-                # Student performance features
-                'num_subjects_completed': student_features.get('num_subjects_completed', 0),
-                'current_gpa': student_features.get('current_gpa', 0.0),
-                'gpa_trend_last_3': student_features.get('gpa_trend_last_3', 0.0),
-                'avg_coursework_percentage': student_features.get('avg_coursework_percentage', 0.0),
-                'avg_overall_percentage': student_features.get('avg_overall_percentage', 0.0),
-                'num_fails': student_features.get('num_fails', 0),
-                'fail_rate': student_features.get('fail_rate', 0.0),
-                
-                # Prerequisite features
-                'num_prerequisites': prereq_features.get('num_prerequisites', 0),
-                'num_prerequisites_completed': prereq_features.get('num_prerequisites_completed', 0),
-                'num_prerequisites_missing': prereq_features.get('num_prerequisites_missing', 0),
-                'avg_prereq_grade_points': prereq_features.get('avg_prereq_grade_points', 0.0),
-                'weighted_prereq_gpa': prereq_features.get('weighted_prereq_gpa', 0.0),
-                'min_prereq_grade': prereq_features.get('min_prereq_grade', 0.0),
-                'max_prereq_grade': prereq_features.get('max_prereq_grade', 0.0),
-                
-                # Subject cohort features
-                'subject_pass_rate': cohort_features.get('subject_pass_rate', 0.5),
-                'subject_avg_score': cohort_features.get('subject_avg_score', 50.0),
-                'subject_avg_gpa': cohort_features.get('subject_avg_gpa', 2.0),
-                'subject_total_students': cohort_features.get('subject_total_students', 0),
-                
-                # Encoded categorical features
-                'programme_code_encoded': programme_code_encoded,
-                'gender_encoded': gender_encoded,
-                'subject_code_encoded': subject_code_encoded,
-                
-                # Additional features
+            X = np.zeros((1, self._n_feat), dtype=np.float32)
+            self._fill_rows(X, [{
+                'student_features': student_features,
+                'prereq_features': prereq_features,
+                'cohort_features': cohort_features,
+                'subject_code': subject_code,
+                'programme_code': programme_code,
+                'gender': gender,
                 'cohort': cohort,
-                'has_financial_aid': 1 if has_financial_aid else 0,
-            }
-            
-            # Create DataFrame with correct column order
-            X = pd.DataFrame([features])[self.feature_columns]
+                'has_financial_aid': has_financial_aid,
+            }])
             return X
             
         except Exception as e:
             print(f"Error preparing features: {e}")
             return None
     
+    def _fill_rows(self, X: np.ndarray, items: List[Dict]) -> None:
+        """Write features for `items` (predictions_data-style dicts) into X in one numpy assignment"""
+        plan = self._row_plan
+        enc_maps = self._enc_maps
+        subject_map = enc_maps.get('subject_code')
+        programme_map = enc_maps.get('programme_code')
+        gender_map = enc_maps.get('gender')
+        
+        rows = []
+        for d in items:
+            programme_code = d.get('programme_code', '')
+            gender = d.get('gender', '')
+            sources = (
+                d['student_features'], d['prereq_features'], d['cohort_features'],
+                {
+                    # Encoded categorical features (-1 for unknown values, 0 when no encoder / no value)
+                    'programme_code_encoded': programme_map.get(programme_code, -1) if programme_map is not None and programme_code else 0,
+                    'gender_encoded': gender_map.get(gender, -1) if gender_map is not None and gender else 0,
+                    'subject_code_encoded': subject_map.get(d['subject_code'], -1) if subject_map is not None else 0,
+                    # Additional features
+                    'cohort': d.get('cohort', 0),
+                    'has_financial_aid': 1 if d.get('has_financial_aid', False) else 0,
+                },
+            )
+            rows.append([sources[src].get(name, default) for name, src, default in plan])
+        X[:] = rows
+    
     def predict(
         self,
         student_features: Dict,
@@ -194,7 +383,7 @@ class MLPredictionService:
                 return None
             
             # Get prediction probability
-            proba = self.model.predict_proba(X)[0]
+            proba = self._predict_proba(X)[0]
             success_probability = proba[1]  # Probability of passing
             
             # Calculate confidence (how certain the model is)
@@ -251,35 +440,41 @@ class MLPredictionService:
             return [None] * len(predictions_data)
         
         try:
-            # Prepare all features at once
-            feature_dfs = []
-            for data in predictions_data:
-                X = self.prepare_features(
-                    student_features=data['student_features'],
-                    prereq_features=data['prereq_features'],
-                    cohort_features=data['cohort_features'],
-                    subject_code=data['subject_code'],
-                    programme_code=data.get('programme_code', ''),
-                    gender=data.get('gender', ''),
-                    cohort=data.get('cohort', 0),
-                    has_financial_aid=data.get('has_financial_aid', False)
-                )
-                feature_dfs.append(X)
+            # Fill one contiguous feature matrix column by column; if any item is
+            # malformed, redo it row by row so only the failing rows are masked out
+            n = len(predictions_data)
+            X_all = np.zeros((n, self._n_feat), dtype=np.float32)
+            valid_mask = np.ones(n, dtype=bool)
+            try:
+                self._fill_rows(X_all, predictions_data)
+            except Exception:
+                for i, data in enumerate(predictions_data):
+                    try:
+                        self._fill_rows(X_all[i:i + 1], [data])
+                    except Exception as e:
+                        valid_mask[i] = False
+                        print(f"Error preparing features: {e}")
             
-            # Filter out None values
-            valid_indices = [i for i, X in enumerate(feature_dfs) if X is not None]
-            if not valid_indices:
-                return [None] * len(predictions_data)
+            valid_indices = np.flatnonzero(valid_mask)
+            if len(valid_indices) == 0:
+                return [None] * n
             
-            valid_features = [feature_dfs[i] for i in valid_indices]
+            # Batch inference - predict all valid rows at once
+            X_batch = X_all if len(valid_indices) == n else X_all[valid_mask]
             
-            # Batch inference - concatenate all features and predict once
-            X_batch = pd.concat(valid_features, ignore_index=True)
-            probas = self.model.predict_proba(X_batch)  # Single model call!
+            # Identical feature rows (e.g. a subject requested twice) share one tree traversal
+            slots: Dict[bytes, int] = {}
+            inverse = [slots.setdefault(row.tobytes(), len(slots)) for row in X_batch]
+            if len(slots) < len(inverse):
+                first = np.unique(inverse, return_index=True)[1]
+                probas = self._predict_proba(X_batch[first])[inverse]
+            else:
+                probas = self._predict_proba(X_batch)  # Single model call!
             
             # Process results
-            results = [None] * len(predictions_data)
-            for idx, i in enumerate(valid_indices):
+            results = [None] * n
+            top_factors_by_slot: Dict[int, List[Tuple[str, float]]] = {}
+            for idx, i in enumerate(valid_indices.tolist()):
                 proba = probas[idx]
                 success_probability = proba[1]
                 confidence = abs(success_probability - 0.5) * 2
@@ -294,8 +489,11 @@ class MLPredictionService:
                 else:
                     risk_level = 'very_high'
                 
-                # Get top factors
-                top_factors = self._get_top_factors(valid_features[idx])
+                # Get top factors (once per distinct row)
+                slot = inverse[idx]
+                top_factors = top_factors_by_slot.get(slot)
+                if top_factors is None:
+                    top_factors = top_factors_by_slot[slot] = self._get_top_factors(X_batch[idx:idx + 1])
                 
                 results[i] = MLPrediction(
                     success_probability=float(success_probability),
@@ -310,26 +508,17 @@ class MLPredictionService:
             print(f"Error making batch ML predictions: {e}")
             return [None] * len(predictions_data)
     
-    def _get_top_factors(self, X: pd.DataFrame, top_n: int = 5) -> List[Tuple[str, float]]:
+    def _get_top_factors(self, X: np.ndarray, top_n: int = 5) -> List[Tuple[str, float]]:
         """Get top contributing factors for this prediction"""
         if self.feature_importance is None:
             return []
         
         try:
-            # Get feature values
-            feature_values = X.iloc[0].to_dict()
-            
-            # Calculate contribution (feature_value * feature_importance)
-            contributions = []
-            for feature, value in feature_values.items():
-                importance = self.feature_importance.get(feature, 0.0)
-                # Normalize contribution
-                contrib = abs(value) * importance
-                contributions.append((self._format_feature_name(feature), contrib))
-            
-            # Sort by contribution
-            contributions.sort(key=lambda x: x[1], reverse=True)
-            return contributions[:top_n]
+            # Contribution = |feature value| * feature importance
+            contrib = np.abs(X[0].astype(np.float64)) * self._imp_vec
+            # Stable sort keeps column order among ties (n_features is small)
+            top = np.argsort(-contrib, kind='stable')[:top_n]
+            return [(self._display_names[i], float(contrib[i])) for i in top.tolist()]
             
         except Exception as e:
             print(f"Error calculating top factors: {e}")
@@ -354,8 +543,12 @@ class MLPredictionService:
         return name_map.get(feature, feature.replace('_', ' ').title())
 
 
-# Singleton instance
+# Singleton instance (built and warmed at import when PF_EAGER_ML=1, so the
+# first request does not pay for joblib load + ONNX export)
 _ml_service: Optional[MLPredictionService] = None
+if os.environ.get("PF_EAGER_ML") == "1":
+    _ml_service = MLPredictionService()
+    _ml_service.warm_up()
 
 def get_ml_prediction_service() -> MLPredictionService:
     """Get or create ML prediction service singleton"""
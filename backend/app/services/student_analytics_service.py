@@ -8,6 +8,11 @@ import numpy as np
 from app.models import StudentProfile, StudentTermStat, SubjectBrief
 
 DATA_PATH = os.environ.get("PF_FLATTENED_CSV", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "flattened_students_subjects.csv"))
+# Derived caches of DATA_PATH, rebuilt whenever the CSV is newer.
+# Bump _CACHE_VERSION when the normalized dtypes change so stale files are ignored.
+_CACHE_VERSION = 2
+PARQUET_PATH = f"{os.path.splitext(DATA_PATH)[0]}.v{_CACHE_VERSION}.parquet"
+COHORT_MEANS_PATH = f"{DATA_PATH}.cohort_means.v{_CACHE_VERSION}.parquet"
 
 GRADE_TO_POINTS: Dict[str, float] = {
     'A+': 4.0, 'A': 4.0, 'A-': 3.7,
@@ -18,6 +23,12 @@ GRADE_TO_POINTS: Dict[str, float] = {
 }
 PASS_GRADES = {k for k, v in GRADE_TO_POINTS.items() if v > 0.0}
 
+# Lookup tables indexed by the `grade` categorical codes; the extra last slot
+# is hit by code -1 (grade outside GRADE_TO_POINTS, e.g. 'P' or 'EX')
+_GRADE_CATEGORIES = list(GRADE_TO_POINTS.keys())
+_POINTS_LUT = np.array([GRADE_TO_POINTS[g] for g in _GRADE_CATEGORIES] + [np.nan], dtype=np.float64)
+_PASS_LUT = np.array([g in PASS_GRADES for g in _GRADE_CATEGORIES] + [False], dtype=bool)
+
 
 @lru_cache(maxsize=1)
 def _load_df() -> pd.DataFrame:
@@ -29,6 +40,26 @@ def _load_df() -> pd.DataFrame:
         ]
         return pd.DataFrame(columns=cols)
 
+    return _parquet_cached(PARQUET_PATH, _read_csv)
+
+
+def _parquet_cached(path: str, build) -> pd.DataFrame:
+    """Load `path` if it is at least as new as DATA_PATH, else build() and write it there"""
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(DATA_PATH):
+        try:
+            return pd.read_parquet(path, engine='pyarrow')
+        except Exception:
+            pass  # unreadable cache or no pyarrow: rebuild below
+
+    df = build()
+    try:
+        df.to_parquet(path, engine='pyarrow', compression='snappy', index=False)
+    except Exception:
+        pass  # read-only data dir or no pyarrow: keep the in-memory copy only
+    return df
+
+
+def _read_csv() -> pd.DataFrame:
     df = pd.read_csv(DATA_PATH, dtype={
         'student_id': str,
         'subject_code': str,
@@ -41,109 +72,132 @@ def _load_df() -> pd.DataFrame:
     df['overall_percentage'] = pd.to_numeric(df.get('overall_percentage'), errors='coerce')
     df['coursework_percentage'] = pd.to_numeric(df.get('coursework_percentage'), errors='coerce')
     df['exam_percentage'] = pd.to_numeric(df.get('exam_percentage'), errors='coerce')
-    df['grade'] = df['grade'].astype(str).str.strip()
+    df['grade'] = pd.Categorical(df['grade'].astype(str).str.strip(), categories=_GRADE_CATEGORIES)
+    df['subject_code'] = df['subject_code'].astype('category')
     df['term'] = df['exam_year'].astype('Int64').astype(str) + '-' + df['exam_month'].astype('Int64').astype(str).str.zfill(2)
     return df
 
 
 @lru_cache(maxsize=1)
 def _cohort_means() -> pd.DataFrame:
-    df = _load_df()
-    if df.empty:
+    if not os.path.exists(DATA_PATH):
         return pd.DataFrame(columns=['subject_code', 'cohort_mean_overall'])
-    return (
-        df.groupby('subject_code')['overall_percentage']
+    return _parquet_cached(COHORT_MEANS_PATH, lambda: (
+        _load_df().groupby('subject_code', observed=True)['overall_percentage']
           .mean()
           .reset_index()
           .rename(columns={'overall_percentage': 'cohort_mean_overall'})
-    )
+    ))
 
 
-def _subject_brief(row: pd.Series) -> Optional[SubjectBrief]:
-    if row is None or row.empty:
-        return None
+@lru_cache(maxsize=1)
+def _student_columns() -> Dict[str, np.ndarray]:
+    """Per-row numpy columns sorted (stably) by student_id, with per-row derived values.
+
+    get_student_profile slices these with a binary search instead of going through
+    pandas filtering/merge/groupby for every request.
+    """
+    df = _load_df().sort_values('student_id', kind='stable')
+    grade_codes = df['grade'].cat.codes.to_numpy()
+    overall = df['overall_percentage'].to_numpy(dtype=float)
+    cohort_mean = df['subject_code'].map(
+        _cohort_means().set_index('subject_code')['cohort_mean_overall']
+    ).to_numpy(dtype=float)
+    return {
+        'student_id': df['student_id'].to_numpy(dtype=object),
+        'subject_code': df['subject_code'].to_numpy(dtype=object, na_value=None),
+        'subject_name': df['subject_name'].to_numpy(dtype=object, na_value=None),
+        'subject_id': df['subject_code'].cat.codes.to_numpy(),  # -1 for missing codes
+        'term': df['term'].to_numpy(dtype=object),
+        'overall': overall,
+        'points': _POINTS_LUT[grade_codes],
+        'passed': _PASS_LUT[grade_codes],
+        # NaN where the score or the cohort mean is missing
+        'benchmark_delta': overall - cohort_mean,
+    }
+
+
+def _subject_brief(cols: Dict[str, np.ndarray], i: int) -> SubjectBrief:
     return SubjectBrief(
-        subjectcode=row.get('subject_code'),
-        subjectname=row.get('subject_name'),
-        overallpercentage=float(row.get('overall_percentage')) if pd.notna(row.get('overall_percentage')) else None
+        subjectcode=cols['subject_code'][i],
+        subjectname=cols['subject_name'][i],
+        overallpercentage=float(cols['overall'][i])
     )
 
 
+def _nanmean(values: np.ndarray) -> Optional[float]:
+    valid = values[~np.isnan(values)]
+    return float(valid.mean()) if len(valid) else None
+
+
 def get_student_profile(student_id: int) -> Optional[StudentProfile]:
-    df = _load_df()
-    if df.empty:
+    if _load_df().empty:
         return None
 
-    # filter
-    df_s = df[df['student_id'].astype(str) == str(student_id)].copy()
-    if df_s.empty:
+    # slice this student's rows out of the sorted columns
+    all_cols = _student_columns()
+    ids = all_cols['student_id']
+    key = str(student_id)
+    lo, hi = np.searchsorted(ids, key, side='left'), np.searchsorted(ids, key, side='right')
+    if lo == hi:
         return None
-
-    # grade points
-    df_s['points'] = df_s['grade'].map(GRADE_TO_POINTS)
-
-    # benchmark deltas
-    cohort = _cohort_means().set_index('subject_code')
-    df_s['benchmark_delta'] = df_s.apply(
-        lambda r: (r['overall_percentage'] - cohort.loc[r['subject_code'], 'cohort_mean_overall'])
-        if pd.notna(r['overall_percentage']) and r['subject_code'] in cohort.index else np.nan,
-        axis=1
-    )
-
-    # best/worst subject by overall_percentage
-    best_row = df_s.sort_values('overall_percentage', ascending=False).head(1).squeeze()
-    worst_row = df_s.sort_values('overall_percentage', ascending=True).head(1).squeeze()
-
-    # term stats
-    ts = (
-        df_s.groupby('term').agg(
-            avg_percentage=('overall_percentage', 'mean'),
-            total_exams=('subject_code', 'count'),
-            passed=('grade', lambda x: int(x.isin(PASS_GRADES).sum()))
-        ).reset_index()
-    )
-    if not ts.empty:
-        ts['pass_rate'] = (ts['passed'] / ts['total_exams'] * 100.0).round(2)
-        ts = ts.sort_values('term')
+    cols = {name: col[lo:hi] for name, col in all_cols.items()}
+
+    overall = cols['overall']
+    has_score = ~np.isnan(overall)
+    points = cols['points']
+
+    # best/worst subject by overall_percentage (first occurrence on ties)
+    best_subject = worst_subject = None
+    if has_score.any():
+        best_subject = _subject_brief(cols, int(np.nanargmax(overall)))
+        worst_subject = _subject_brief(cols, int(np.nanargmin(overall)))
+
+    # term stats, grouped over the sorted unique terms
+    terms, term_idx = np.unique(cols['term'].astype(str), return_inverse=True)
+    n_terms = len(terms)
+    scored = np.bincount(term_idx, weights=has_score, minlength=n_terms)
+    score_sum = np.bincount(term_idx, weights=np.where(has_score, overall, 0.0), minlength=n_terms)
+    total_exams = np.bincount(term_idx, weights=cols['subject_id'] >= 0, minlength=n_terms)
+    passed = np.bincount(term_idx, weights=cols['passed'], minlength=n_terms)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_percentage = score_sum / scored
+        pass_rate = np.round(passed / total_exams * 100.0, 2)
     term_stats: List[StudentTermStat] = [
         StudentTermStat(
-            term=str(r['term']),
-            avg_percentage=float(r['avg_percentage']) if pd.notna(r['avg_percentage']) else None,
-            total_exams=int(r['total_exams']),
-            pass_rate=float(r['pass_rate']) if pd.notna(r.get('pass_rate')) else None
-        ) for _, r in ts.iterrows()
+            term=str(t),
+            avg_percentage=None if np.isnan(a) else float(a),
+            total_exams=int(n),
+            pass_rate=None if np.isnan(pr) else float(pr)
+        ) for t, a, n, pr in zip(terms.tolist(), avg_percentage, total_exams, pass_rate)
     ]
 
-    # trend per term (simple linear slope)
+    # trend per term (simple linear slope) over rows with a valid overall_percentage
     slope_val: Optional[float] = None
-    if df_s['overall_percentage'].notna().sum() >= 2:
-        # create ordinal index for terms - only use rows with valid overall_percentage
-        df_valid = df_s[df_s['overall_percentage'].notna()].copy()
-        order = {t: i for i, t in enumerate(sorted(df_valid['term'].dropna().unique()))}
-        x = df_valid['term'].map(order).to_numpy()
-        y = df_valid['overall_percentage'].to_numpy()
-        # Filter out any remaining NaN
-        mask = ~(np.isnan(x) | np.isnan(y))
-        x, y = x[mask], y[mask]
-        if len(x) >= 2:
-            try:
-                coeffs = np.polyfit(x, y, 1)
-                slope_val = float(coeffs[0]) if not np.isnan(coeffs[0]) else None
-            except Exception:
-                slope_val = None
+    if has_score.sum() >= 2:
+        # ordinal index of each row's term among the scored terms
+        _, x = np.unique(cols['term'][has_score].astype(str), return_inverse=True)
+        y = overall[has_score]
+        # closed-form least-squares slope; undefined when all rows share one term
+        dx = x - x.mean()
+        denom = (dx * dx).sum()
+        slope_val = float((dx * (y - y.mean())).sum() / denom) if denom > 0 else None
+
+    subject_ids = cols['subject_id']
+    subject_counts = np.bincount(subject_ids[subject_ids >= 0])
 
     profile = StudentProfile(
         student_id=int(student_id),
-        subjects_taken=int(len(df_s)),
-        terms_taken=int(df_s['term'].nunique()),
-        current_gpa=float(df_s['points'].dropna().mean()) if df_s['points'].notna().any() else None,
-        avg_score=float(df_s['overall_percentage'].mean()) if df_s['overall_percentage'].notna().any() else None,
-        score_std=float(df_s['overall_percentage'].std()) if df_s['overall_percentage'].notna().sum() >= 2 else None,
-        best_subject=_subject_brief(best_row) if isinstance(best_row, pd.Series) else None,
-        worst_subject=_subject_brief(worst_row) if isinstance(worst_row, pd.Series) else None,
-        avg_benchmark_delta=float(df_s['benchmark_delta'].mean()) if df_s['benchmark_delta'].notna().any() else None,
-        fails_count=int(df_s['points'].fillna(999).eq(0.0).sum()),
-        retakes_count=int((df_s.groupby('subject_code').size() > 1).sum()),
+        subjects_taken=int(hi - lo),
+        terms_taken=int(n_terms),
+        current_gpa=_nanmean(points),
+        avg_score=_nanmean(overall),
+        score_std=float(np.std(overall[has_score], ddof=1)) if has_score.sum() >= 2 else None,
+        best_subject=best_subject,
+        worst_subject=worst_subject,
+        avg_benchmark_delta=_nanmean(cols['benchmark_delta']),
+        fails_count=int((points == 0.0).sum()),
+        retakes_count=int((subject_counts > 1).sum()),
         score_trend_per_term=slope_val,
         term_stats=term_stats
     )
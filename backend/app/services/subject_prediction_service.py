@@ -8,10 +8,13 @@ Predicts whether a student will pass or struggle with a subject based on:
 """
 import pandas as pd
 import numpy as np
+from bisect import bisect_right
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from dataclasses import dataclass
 from functools import lru_cache
+from collections import deque
 
 # Grade to GPA mapping
 GRADE_POINTS = {
@@ -26,78 +29,102 @@ GRADE_POINTS = {
     'W': None,   # Withdrawn
 }
 
+# GRADE_POINTS plus the starred variants seen in transcripts (C*, D**, ...)
+GRADE_POINTS_FULL = {
+    **{g + '**': v for g, v in GRADE_POINTS.items()},
+    **{g + '*': v for g, v in GRADE_POINTS.items()},
+    **GRADE_POINTS,
+}
+
+# Passing grades (C or better) and failing grades
+PASSING_GRADES = frozenset({'A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C'})
+FAILING_GRADES = frozenset({'D+', 'D', 'D-', 'E', 'F', 'F*'})
+
 # Subject prerequisite/dependency chains
-# Format: target_subject -> [(prereq_code, weight), ...]
+# Format: target_subject -> ((prereq_code, weight), ...)
 # Weight indicates how strongly the prereq impacts the target (0.0-1.0)
-SUBJECT_PREREQUISITES = {
+SUBJECT_PREREQUISITES = MappingProxyType({
     # Database chain
-    'SEG2102': [('SEG1201', 0.9)],  # DatabaseManagementSystems <- DatabaseFundamentals
-    'CSC3064': [('SEG2102', 0.8), ('SEG1201', 0.5)],  # DatabaseEngineering <- DBMS, DBFundamentals
-    'BIS2216': [('SEG1201', 0.6)],  # DataMining <- DatabaseFundamentals
-    'BIS3216': [('BIS2216', 0.8), ('SEG1201', 0.4)],  # DataMiningKnowledgeDiscovery <- DataMiningFund
+    'SEG2102': (('SEG1201', 0.9),),  # DatabaseManagementSystems <- DatabaseFundamentals
+    'CSC3064': (('SEG2102', 0.8), ('SEG1201', 0.5)),  # DatabaseEngineering <- DBMS, DBFundamentals
+    'BIS2216': (('SEG1201', 0.6),),  # DataMining <- DatabaseFundamentals
+    'BIS3216': (('BIS2216', 0.8), ('SEG1201', 0.4)),  # DataMiningKnowledgeDiscovery <- DataMiningFund
     
     # Programming chain
-    'PRG1203': [('CSC1024', 0.9)],  # OOP Fundamentals <- Programming Principles
-    'PRG2104': [('PRG1203', 0.9), ('CSC1024', 0.4)],  # OOP <- OOP Fundamentals
-    'CSC2103': [('PRG1203', 0.8), ('CSC1024', 0.5)],  # Data Structures <- OOP Fund, Programming
-    'CSC2044': [('PRG2104', 0.7), ('PRG1203', 0.5)],  # Concurrent Programming <- OOP
-    'PRG2205': [('PRG2104', 0.7), ('CSC2103', 0.5)],  # Programming Languages <- OOP, DS
-    'PRG2214': [('PRG1203', 0.7), ('CSC1024', 0.5)],  # Functional Programming <- OOP Fund
+    'PRG1203': (('CSC1024', 0.9),),  # OOP Fundamentals <- Programming Principles
+    'PRG2104': (('PRG1203', 0.9), ('CSC1024', 0.4)),  # OOP <- OOP Fundamentals
+    'CSC2103': (('PRG1203', 0.8), ('CSC1024', 0.5)),  # Data Structures <- OOP Fund, Programming
+    'CSC2044': (('PRG2104', 0.7), ('PRG1203', 0.5)),  # Concurrent Programming <- OOP
+    'PRG2205': (('PRG2104', 0.7), ('CSC2103', 0.5)),  # Programming Languages <- OOP, DS
+    'PRG2214': (('PRG1203', 0.7), ('CSC1024', 0.5)),  # Functional Programming <- OOP Fund
     
     # Software Engineering chain
-    'SEG2202': [('PRG1203', 0.6), ('SEG1201', 0.5)],  # Software Engineering <- OOP Fund, DB
-    'CSC3209': [('SEG2202', 0.8), ('PRG2104', 0.6)],  # Software Architecture <- SE, OOP
-    'PRG3014': [('SEG2202', 0.5), ('CSC3024', 0.6)],  # UI/UX <- SE, HCI
+    'SEG2202': (('PRG1203', 0.6), ('SEG1201', 0.5)),  # Software Engineering <- OOP Fund, DB
+    'CSC3209': (('SEG2202', 0.8), ('PRG2104', 0.6)),  # Software Architecture <- SE, OOP
+    'PRG3014': (('SEG2202', 0.5), ('CSC3024', 0.6)),  # UI/UX <- SE, HCI
     
     # AI/ML chain
-    'CSC3206': [('CSC2103', 0.7), ('MTH1114', 0.5)],  # AI <- DS&A, Math
-    'CSC3034': [('CSC3206', 0.8), ('CSC2103', 0.4)],  # Computational Intelligence <- AI, DS&A
-    'CSC3014': [('CSC2014', 0.7), ('CSC3206', 0.5)],  # Computer Vision <- Digital Image, AI
-    'CSC2014': [('MTH1114', 0.5), ('CSC1024', 0.4)],  # Digital Image Processing <- Math, Programming
+    'CSC3206': (('CSC2103', 0.7), ('MTH1114', 0.5)),  # AI <- DS&A, Math
+    'CSC3034': (('CSC3206', 0.8), ('CSC2103', 0.4)),  # Computational Intelligence <- AI, DS&A
+    'CSC3014': (('CSC2014', 0.7), ('CSC3206', 0.5)),  # Computer Vision <- Digital Image, AI
+    'CSC2014': (('MTH1114', 0.5), ('CSC1024', 0.4)),  # Digital Image Processing <- Math, Programming
     
     # Networking chain
-    'NET2201': [('NET1014', 0.9)],  # Computer Networks <- Networking Principles
-    'NET2102': [('NET1014', 0.8)],  # Data Communications <- Networking Principles
-    'NET2103': [('NET2201', 0.7), ('CSC2104', 0.5)],  # Network & System Admin <- Networks, OS
-    'NET3014': [('NET2201', 0.8), ('NET2102', 0.5)],  # Advanced Networks <- Networks, DataComm
-    'NET3106': [('NET2201', 0.7), ('CSC3044', 0.6)],  # Network Security <- Networks, Security
-    'NET3204': [('NET2201', 0.7), ('CSC2104', 0.5)],  # Distributed Systems <- Networks, OS
-    'NET3207': [('NET2201', 0.8), ('NET2103', 0.6)],  # Network Management <- Networks, Admin
-    'MMD3105': [('NET2201', 0.6)],  # Multimedia Networking <- Networks
+    'NET2201': (('NET1014', 0.9),),  # Computer Networks <- Networking Principles
+    'NET2102': (('NET1014', 0.8),),  # Data Communications <- Networking Principles
+    'NET2103': (('NET2201', 0.7), ('CSC2104', 0.5)),  # Network & System Admin <- Networks, OS
+    'NET3014': (('NET2201', 0.8), ('NET2102', 0.5)),  # Advanced Networks <- Networks, DataComm
+    'NET3106': (('NET2201', 0.7), ('CSC3044', 0.6)),  # Network Security <- Networks, Security
+    'NET3204': (('NET2201', 0.7), ('CSC2104', 0.5)),  # Distributed Systems <- Networks, OS
+    'NET3207': (('NET2201', 0.8), ('NET2103', 0.6)),  # Network Management <- Networks, Admin
+    'MMD3105': (('NET2201', 0.6),),  # Multimedia Networking <- Networks
     
     # Security chain
-    'CSC3044': [('NET2201', 0.6), ('CSC2104', 0.5)],  # Computer Security <- Networks, OS
-    'SEC3024': [('CSC3044', 0.8), ('NET2201', 0.5)],  # CEH <- Security, Networks
-    'SEC3014': [('NET3106', 0.8), ('CSC3044', 0.5)],  # Advanced Network Security
-    'SEC3034': [('SEC3024', 0.7), ('CSC3044', 0.6)],  # Forensic Investigator <- CEH, Security
-    'SEC3044': [('CSC3044', 0.8), ('SEC3024', 0.6)],  # Advanced Security Topics
+    'CSC3044': (('NET2201', 0.6), ('CSC2104', 0.5)),  # Computer Security <- Networks, OS
+    'SEC3024': (('CSC3044', 0.8), ('NET2201', 0.5)),  # CEH <- Security, Networks
+    'SEC3014': (('NET3106', 0.8), ('CSC3044', 0.5)),  # Advanced Network Security
+    'SEC3034': (('SEC3024', 0.7), ('CSC3044', 0.6)),  # Forensic Investigator <- CEH, Security
+    'SEC3044': (('CSC3044', 0.8), ('SEC3024', 0.6)),  # Advanced Security Topics
     
     # Operating Systems chain  
-    'CSC2104': [('CSC1202', 0.7), ('CSC1024', 0.5)],  # OS Fundamentals <- Comp Org, Programming
-    'OSS1014': [('CSC1202', 0.7), ('CSC1024', 0.5)],  # OS Fundamentals (alt code)
+    'CSC2104': (('CSC1202', 0.7), ('CSC1024', 0.5)),  # OS Fundamentals <- Comp Org, Programming
+    'OSS1014': (('CSC1202', 0.7), ('CSC1024', 0.5)),  # OS Fundamentals (alt code)
     
     # Web chain
-    'WEB2202': [('WEB1201', 0.9), ('PRG1203', 0.5)],  # Web Programming <- Web Fund, OOP
+    'WEB2202': (('WEB1201', 0.9), ('PRG1203', 0.5)),  # Web Programming <- Web Fund, OOP
     
     # Math chain
-    'MTH2103': [('MTH1114', 0.8), ('IST1024', 0.5)],  # Probability & Stats <- Math, Intro Stats
-    'IST2024': [('IST1024', 0.7), ('MTH1114', 0.4)],  # Applied Statistics <- Intro Stats, Math
+    'MTH2103': (('MTH1114', 0.8), ('IST1024', 0.5)),  # Probability & Stats <- Math, Intro Stats
+    'IST2024': (('IST1024', 0.7), ('MTH1114', 0.4)),  # Applied Statistics <- Intro Stats, Math
     
     # Analytics chain
-    'IST2334': [('SEG1201', 0.5), ('NET1014', 0.4)],  # Web & Network Analytics
-    'IST2134': [('IST1024', 0.5)],  # Social Media Analytics
-    'IST2234': [('IST1024', 0.6), ('IST2034', 0.5)],  # Visual Analytics
-    'IST3134': [('SEG2102', 0.6), ('IST2024', 0.5)],  # Big Data Analytics
-    'IST3144': [('IST2024', 0.7)],  # Problem Solving Analytics
-    'IST3244': [('IST2024', 0.8), ('IST2234', 0.5)],  # Advanced Business Analytics
-    'BIS3218': [('BIS2216', 0.7), ('SEG2102', 0.5)],  # Business Intelligence
+    'IST2334': (('SEG1201', 0.5), ('NET1014', 0.4)),  # Web & Network Analytics
+    'IST2134': (('IST1024', 0.5),),  # Social Media Analytics
+    'IST2234': (('IST1024', 0.6), ('IST2034', 0.5)),  # Visual Analytics
+    'IST3134': (('SEG2102', 0.6), ('IST2024', 0.5)),  # Big Data Analytics
+    'IST3144': (('IST2024', 0.7),),  # Problem Solving Analytics
+    'IST3244': (('IST2024', 0.8), ('IST2234', 0.5)),  # Advanced Business Analytics
+    'BIS3218': (('BIS2216', 0.7), ('SEG2102', 0.5)),  # Business Intelligence
     
     # Project chain
-    'PRJ3213': [('SEG2202', 0.6), ('PRG2104', 0.5)],  # Capstone 1 <- SE, OOP
-    'PRJ3223': [('PRJ3213', 0.9)],  # Capstone 2 <- Capstone 1
+    'PRJ3213': (('SEG2202', 0.6), ('PRG2104', 0.5)),  # Capstone 1 <- SE, OOP
+    'PRJ3223': (('PRJ3213', 0.9),),  # Capstone 2 <- Capstone 1
     
     # HCI
-    'CSC3024': [('SEG2202', 0.4), ('PRG1203', 0.4)],  # HCI <- SE, OOP Fund
+    'CSC3024': (('SEG2202', 0.4), ('PRG1203', 0.4)),  # HCI <- SE, OOP Fund
+})
+
+# Low-cardinality string columns stored as categoricals
+CATEGORY_COLUMNS = ('subject_code', 'subject_name', 'grade', 'status')
+
+# Columns read from the flattened CSV and their dtypes
+CSV_DTYPES = {
+    'student_id': 'int64',
+    'subject_code': 'category',
+    'subject_name': 'category',
+    'grade': 'category',
+    'overall_percentage': 'float64',
+    'status': 'category',
 }
 
 # Risk thresholds
@@ -107,8 +134,25 @@ RISK_THRESHOLDS = {
     'low': 3.3,     # B+ and above = low risk
 }
 
+# Ascending threshold bins and the risk level for each bucket they delimit
+RISK_BINS = (RISK_THRESHOLDS['high'], RISK_THRESHOLDS['medium'], RISK_THRESHOLDS['low'])
+RISK_NAMES = ('very_high', 'high', 'medium', 'low')
+
+# Sort rank of each risk level for the recommended order (lower first)
+RISK_ORDER = {'low': 0, 'medium': 1, 'high': 2, 'very_high': 3, 'unknown': 1}
+
+
+class StudentSubject(NamedTuple):
+    """A subject on a student's record (one flat tuple per subject)"""
+    subject_code: str
+    subject_name: str
+    grade: str
+    grade_points: Optional[float]
+    overall_percentage: Optional[float]
+    status: Optional[str]
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PrerequisitePerformance:
     """Performance in a single prerequisite subject"""
     subject_code: str
@@ -119,7 +163,7 @@ class PrerequisitePerformance:
     impact_score: float  # grade_points * weight
 
 
-@dataclass 
+@dataclass(frozen=True, slots=True)
 class SubjectPrediction:
     """Prediction for a single subject"""
     subject_code: str
@@ -127,35 +171,48 @@ class SubjectPrediction:
     risk_level: str  # 'low', 'medium', 'high', 'very_high'
     predicted_success_probability: float  # 0.0 - 1.0
     weighted_prereq_gpa: float
-    prereq_performance: List[PrerequisitePerformance]
-    missing_prereqs: List[str]
+    prereq_performance: Tuple[PrerequisitePerformance, ...]
+    missing_prereqs: Tuple[str, ...]
     recommendation: str
     cohort_pass_rate: Optional[float] = None
     cohort_avg_score: Optional[float] = None
     # ML-based predictions (hybrid approach)
     ml_probability: Optional[float] = None  # ML model prediction
     ml_confidence: Optional[float] = None  # ML confidence score
-    ml_top_factors: Optional[List[tuple]] = None  # Top contributing factors
+    ml_top_factors: Optional[Tuple[tuple, ...]] = None  # Top contributing factors
     prediction_method: str = 'rule-based'  # 'rule-based', 'ml', or 'hybrid'
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StudentPredictionReport:
-    """Full prediction report for a student's planned subjects"""
+    """Full prediction report for a student's planned subjects.
+    Reports are cached and shared between callers, so they are immutable.
+    """
     student_id: int
     current_gpa: float
-    predictions: List[SubjectPrediction] = field(default_factory=list)
-    high_risk_subjects: List[str] = field(default_factory=list)
-    recommended_order: List[str] = field(default_factory=list)
+    predictions: Tuple[SubjectPrediction, ...] = ()
+    high_risk_subjects: Tuple[str, ...] = ()
+    recommended_order: Tuple[str, ...] = ()
 
 
 class SubjectPredictionService:
     """Service for predicting student success in subjects (Hybrid: Rule-based + ML)"""
     
+    # Parsed flattened CSV shared across instances, keyed by (path, mtime)
+    _CSV_CACHE: Dict[Tuple[str, float], Tuple[pd.DataFrame, np.ndarray, np.ndarray]] = {}
+    
     def __init__(self):
         self.df: Optional[pd.DataFrame] = None
-        self.cohort_stats: Dict[str, Dict] = {}
+        self._cohort_stats: Optional[Dict[str, Dict]] = None
+        self._student_ids: Optional[np.ndarray] = None
+        self._student_rows: Optional[np.ndarray] = None
+        # Per-instance LRU caches keyed by student_id
+        self._get_student_subjects = lru_cache(maxsize=512)(self._fetch_student_subjects)
+        self._get_cached_student_performance = lru_cache(maxsize=512)(self._fetch_student_performance)
+        self._get_report = lru_cache(maxsize=256)(self._build_report)
+        self._chain_cache: Dict[str, Dict] = {}
         self.ml_service = None
+        self._ml_ready = False
         self._load_data()
         self._load_ml_service()
     
@@ -167,9 +224,18 @@ class SubjectPredictionService:
         print(f"🔍 File exists: {data_path.exists()}")
         
         if data_path.exists():
+            key = (str(data_path), data_path.stat().st_mtime)
+            cached = self._CSV_CACHE.get(key)
+            if cached is not None:
+                self.df, self._student_ids, self._student_rows = cached
+                print(f"✓ Reusing {len(self.df)} records parsed from flattened CSV")
+                return
+            
             print(f"✓ Loading from flattened CSV...")
-            self.df = pd.read_csv(data_path)
-            self._compute_cohort_stats()
+            self.df = self._read_flattened_csv(data_path)
+            self._index_students()
+            # Keep only the latest parse so an edited file doesn't pin the old frame
+            SubjectPredictionService._CSV_CACHE = {key: (self.df, self._student_ids, self._student_rows)}
             print(f"✓ Loaded {len(self.df)} records from flattened CSV")
             return
         
@@ -203,12 +269,28 @@ class SubjectPredictionService:
                 continue
         
         if rows:
-            self.df = pd.DataFrame(rows)
-            self._compute_cohort_stats()
+            self.df = self._categorize(pd.DataFrame(rows))
+            self._index_students()
             print(f"✓ Loaded {len(self.df)} subject records from CSV for {self.df['student_id'].nunique()} students")
         else:
             print("❌ No data could be loaded from CSV")
     
+    @staticmethod
+    def _read_flattened_csv(path: Path) -> pd.DataFrame:
+        """Read only the consumed columns, with the Arrow parser when pyarrow is installed"""
+        try:
+            return pd.read_csv(path, engine='pyarrow', usecols=list(CSV_DTYPES), dtype=CSV_DTYPES)
+        except ImportError:
+            return pd.read_csv(path, usecols=list(CSV_DTYPES), dtype=CSV_DTYPES)
+    
+    @staticmethod
+    def _categorize(df: pd.DataFrame) -> pd.DataFrame:
+        """Convert repeated string columns to categoricals (filters and groupby run on codes)"""
+        for col in CATEGORY_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        return df
+    
     def _load_ml_service(self):
         """Load ML prediction service for hybrid predictions"""
         try:
@@ -217,52 +299,95 @@ class SubjectPredictionService:
         except Exception as e:
             print(f"⚠ ML service not available: {e}")
             self.ml_service = None
+        # The model is loaded once with the service, so availability is fixed from here on
+        self._ml_ready = self.ml_service is not None and self.ml_service.is_available()
+    
+    def _index_students(self):
+        """Sort rows by student_id once so per-student lookups are a binary search"""
+        # Normalise grades once; on a categorical this runs per distinct grade, not per row
+        self.df['grade_points'] = self.df['grade'].map(self._get_grade_points).astype(float)
+        by_student = self.df
+        if 'status' not in by_student.columns:
+            by_student = by_student.assign(status='')
+        # Stable sort keeps each student's rows in file order
+        by_student = by_student.sort_values('student_id', kind='stable')
+        self._student_ids = by_student['student_id'].to_numpy()
+        self._student_rows = by_student[
+            ['subject_code', 'subject_name', 'grade', 'grade_points', 'overall_percentage', 'status']
+        ].to_numpy(dtype=object)
+        # Ungraded rows keep None points, as _get_grade_points returns
+        gp = self._student_rows[:, 3]
+        gp[pd.isna(gp)] = None
+        # Cached per-student dicts, cohort stats and chains belong to the previous data
+        self.clear_student_caches()
+        self._cohort_stats = None
+        self._chain_cache = {}
+    
+    def _student_slice(self, student_id: int) -> slice:
+        """Row range of a student in the sorted arrays (empty if unknown)"""
+        lo = self._student_ids.searchsorted(student_id, 'left')
+        hi = self._student_ids.searchsorted(student_id, 'right')
+        return slice(lo, hi)
+    
+    def has_student(self, student_id: int) -> bool:
+        """Check whether a student has any subject records"""
+        if self._student_ids is None:
+            return False
+        rows = self._student_slice(student_id)
+        return rows.stop > rows.start
+    
+    @property
+    def cohort_stats(self) -> Dict[str, Dict]:
+        """Per-subject cohort statistics, computed on first use"""
+        if self._cohort_stats is None:
+            self._cohort_stats = self._compute_cohort_stats()
+        return self._cohort_stats
     
-    def _compute_cohort_stats(self):
+    def _compute_cohort_stats(self) -> Dict[str, Dict]:
         """Compute cohort-level statistics for each subject"""
         if self.df is None:
-            return
+            return {}
             
         # Filter to graded subjects only
         graded = self.df[self.df['grade'].notna() & ~self.df['grade'].isin(['P', 'EX', 'INC', 'W', '-'])]
+        graded = graded.assign(
+            _gp=graded['grade'].map(GRADE_POINTS).astype(float),
+            _pass=graded['grade'].isin(PASSING_GRADES),
+        )
         
-        for code in graded['subject_code'].unique():
-            subject_data = graded[graded['subject_code'] == code]
-            
-            # Calculate pass rate (C or better)
-            passing_grades = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C']
-            passed = subject_data[subject_data['grade'].isin(passing_grades)]
-            pass_rate = len(passed) / len(subject_data) if len(subject_data) > 0 else 0
-            
-            # Calculate average score
-            valid_scores = subject_data['overall_percentage'].dropna()
-            avg_score = valid_scores.mean() if len(valid_scores) > 0 else None
-            
-            # Calculate average GPA
-            gpas = []
-            for grade in subject_data['grade']:
-                if grade in GRADE_POINTS and GRADE_POINTS[grade] is not None:
-                    gpas.append(GRADE_POINTS[grade])
-            avg_gpa = np.mean(gpas) if gpas else None
-            
-            self.cohort_stats[code] = {
-                'pass_rate': pass_rate,
-                'avg_score': avg_score,
-                'avg_gpa': avg_gpa,
-                'total_students': len(subject_data),
-                'subject_name': subject_data['subject_name'].iloc[0] if len(subject_data) > 0 else code
+        # Single grouped pass instead of re-filtering per subject
+        agg = graded.groupby('subject_code', sort=False, observed=True).agg(
+            pass_rate=('_pass', 'mean'),
+            avg_score=('overall_percentage', 'mean'),
+            avg_gpa=('_gp', 'mean'),
+            total_students=('grade', 'size'),
+        )
+        # 'first' in groupby skips NaN; keep the literal first row's name
+        names = graded.drop_duplicates('subject_code').set_index('subject_code')['subject_name']
+        
+        cohort_stats = {}
+        for code, stats in agg.to_dict(orient='index').items():
+            cohort_stats[code] = {
+                'pass_rate': stats['pass_rate'],
+                'avg_score': None if pd.isna(stats['avg_score']) else stats['avg_score'],
+                'avg_gpa': None if pd.isna(stats['avg_gpa']) else stats['avg_gpa'],
+                'total_students': int(stats['total_students']),
+                'subject_name': names[code],
             }
+        return cohort_stats
     
     def _get_grade_points(self, grade: str) -> Optional[float]:
         """Convert grade to grade points"""
         if not grade:
             return None
+        if grade in GRADE_POINTS_FULL:
+            return GRADE_POINTS_FULL[grade]
         grade = str(grade).strip().upper()
         # Handle special cases like F*, D**, C*
         clean_grade = grade.rstrip('*')
         return GRADE_POINTS.get(clean_grade, GRADE_POINTS.get(grade))
     
-    def _calculate_student_performance_features(self, student_id: int, student_subjects: Dict[str, Dict]) -> Dict:
+    def _calculate_student_performance_features(self, student_id: int, student_subjects: Dict[str, StudentSubject]) -> Dict:
         """Calculate student performance features for ML model"""
         if not student_subjects:
             return {
@@ -276,23 +401,22 @@ class SubjectPredictionService:
             }
         
         # Calculate current GPA
-        gpas = [s['grade_points'] for s in student_subjects.values() if s['grade_points'] is not None]
-        current_gpa = np.mean(gpas) if gpas else 0.0
+        gpas = [s.grade_points for s in student_subjects.values() if s.grade_points is not None]
+        current_gpa = sum(gpas) / len(gpas) if gpas else 0.0
         
         # GPA trend (last 3 vs previous 3)
         gpa_trend = 0.0
         if len(gpas) >= 6:
-            recent_3 = np.mean(gpas[-3:])
-            previous_3 = np.mean(gpas[-6:-3])
+            recent_3 = sum(gpas[-3:]) / 3
+            previous_3 = sum(gpas[-6:-3]) / 3
             gpa_trend = recent_3 - previous_3
         
         # Average percentages
-        percentages = [s['overall_percentage'] for s in student_subjects.values() if s.get('overall_percentage') is not None]
-        avg_overall = np.mean(percentages) if percentages else 0.0
+        percentages = [s.overall_percentage for s in student_subjects.values() if s.overall_percentage is not None]
+        avg_overall = sum(percentages) / len(percentages) if percentages else 0.0
         
         # Fail count
-        failing_grades = ['D+', 'D', 'D-', 'E', 'F', 'F*']
-        num_fails = sum(1 for s in student_subjects.values() if s['grade'] in failing_grades)
+        num_fails = sum(1 for s in student_subjects.values() if s.grade in FAILING_GRADES)
         fail_rate = num_fails / len(student_subjects) if student_subjects else 0.0
         
         return {
@@ -305,93 +429,49 @@ class SubjectPredictionService:
             'fail_rate': fail_rate
         }
     
-    def _get_student_subjects(self, student_id: int) -> Dict[str, Dict]:
-        """Get all subjects taken by a student with their grades (with LRU caching)"""
-        # Initialize cache if needed
-        if not hasattr(self, '_student_cache'):
-            self._student_cache = {}
-        if not hasattr(self, '_student_perf_cache'):
-            self._student_perf_cache = {}
-        
-        # Check cache first
-        if student_id in self._student_cache:
-            return self._student_cache[student_id]
-        
-        if self.df is None:
+    def clear_student_caches(self):
+        """Drop cached per-student subjects, performance features and reports"""
+        self._get_student_subjects.cache_clear()
+        self._get_cached_student_performance.cache_clear()
+        self._get_report.cache_clear()
+    
+    def _fetch_student_subjects(self, student_id: int) -> Dict[str, StudentSubject]:
+        """Get all subjects taken by a student with their grades (cached as _get_student_subjects)"""
+        if self._student_ids is None:
             return {}
         
-        student_data = self.df[self.df['student_id'] == student_id]
-        subjects = {}
-        
-        for _, row in student_data.iterrows():
-            code = row['subject_code']
-            grade = row['grade']
-            gp = self._get_grade_points(grade)
-            
-            subjects[code] = {
-                'subject_code': code,
-                'subject_name': row['subject_name'],
-                'grade': grade,
-                'grade_points': gp,
-                'overall_percentage': row['overall_percentage'],
-                'status': row.get('status', '')
-            }
-        
-        # LRU-style caching: Remove oldest if cache is full
-        if len(self._student_cache) >= 500:  # Increased from 100 to 500
-            # Remove 20% oldest entries
-            items = list(self._student_cache.items())
-            self._student_cache = dict(items[100:])
-        
-        self._student_cache[student_id] = subjects
-        return subjects
+        # Later rows for the same code overwrite earlier ones, as before
+        rows = self._student_rows[self._student_slice(student_id)].tolist()
+        return {row[0]: StudentSubject._make(row) for row in rows}
     
-    def _get_cached_student_performance(self, student_id: int, student_subjects: Dict[str, Dict]) -> Dict:
-        """Get cached student performance features or calculate and cache"""
-        if not hasattr(self, '_student_perf_cache'):
-            self._student_perf_cache = {}
-        
-        if student_id in self._student_perf_cache:
-            return self._student_perf_cache[student_id]
-        
-        # Calculate and cache
-        perf = self._calculate_student_performance_features(student_id, student_subjects)
-        
-        # LRU-style caching
-        if len(self._student_perf_cache) >= 500:
-            items = list(self._student_perf_cache.items())
-            self._student_perf_cache = dict(items[100:])
-        
-        self._student_perf_cache[student_id] = perf
-        return perf
+    def _fetch_student_performance(self, student_id: int) -> Dict:
+        """Student performance features for the ML model (cached as _get_cached_student_performance)"""
+        return self._calculate_student_performance_features(student_id, self._get_student_subjects(student_id))
     
-    def _predict_with_subjects(
-        self, 
-        student_id: int, 
+    def _analyze_prereqs(
+        self,
         target_subject_code: str,
-        student_subjects: Dict[str, Dict],
-        precomputed_ml: Optional[any] = None
-    ) -> SubjectPrediction:
-        """Internal prediction method that accepts pre-fetched student subjects and optional precomputed ML prediction"""
-        prereqs = SUBJECT_PREREQUISITES.get(target_subject_code, [])
+        student_subjects: Dict[str, StudentSubject]
+    ) -> Tuple[Tuple, List[PrerequisitePerformance], List[str], float, float]:
+        """Match a subject's prerequisites against the student's record"""
+        prereqs = SUBJECT_PREREQUISITES.get(target_subject_code, ())
         
         prereq_performance = []
         missing_prereqs = []
         total_weighted_score = 0.0
         total_weight = 0.0
         
-        # Analyze prerequisite performance
         for prereq_code, weight in prereqs:
             if prereq_code in student_subjects:
                 subj = student_subjects[prereq_code]
-                gp = subj['grade_points']
+                gp = subj.grade_points
                 
                 if gp is not None:
                     impact = gp * weight
                     prereq_performance.append(PrerequisitePerformance(
                         subject_code=prereq_code,
-                        subject_name=subj['subject_name'],
-                        grade=subj['grade'],
+                        subject_name=subj.subject_name,
+                        grade=subj.grade,
                         grade_points=gp,
                         weight=weight,
                         impact_score=impact
@@ -403,6 +483,59 @@ class SubjectPredictionService:
         
         # Calculate weighted prerequisite GPA
         weighted_prereq_gpa = total_weighted_score / total_weight if total_weight > 0 else 0.0
+        return prereqs, prereq_performance, missing_prereqs, weighted_prereq_gpa, total_weight
+    
+    @staticmethod
+    def _ml_features(
+        prereqs: Tuple,
+        prereq_performance: List[PrerequisitePerformance],
+        missing_prereqs: List[str],
+        weighted_prereq_gpa: float,
+        cohort: Dict
+    ) -> Tuple[Dict, Dict]:
+        """Build the prerequisite and cohort feature dicts the ML model expects"""
+        # One pass for sum/min/max instead of building a list for each reduction
+        total = 0.0
+        low = high = None
+        for p in prereq_performance:
+            gp = p.grade_points
+            total += gp
+            if low is None or gp < low:
+                low = gp
+            if high is None or gp > high:
+                high = gp
+        n_done = len(prereq_performance)
+        prereq_features = {
+            'num_prerequisites': len(prereqs),
+            'num_prerequisites_completed': n_done,
+            'num_prerequisites_missing': len(missing_prereqs),
+            'avg_prereq_grade_points': total / n_done if n_done else 0.0,
+            'weighted_prereq_gpa': weighted_prereq_gpa,
+            'min_prereq_grade': low if n_done else 0.0,
+            'max_prereq_grade': high if n_done else 0.0,
+        }
+        
+        cohort_features = {
+            'subject_pass_rate': cohort.get('pass_rate') if cohort.get('pass_rate') is not None else 0.5,
+            'subject_avg_score': cohort.get('avg_score') if cohort.get('avg_score') is not None else 50.0,
+            'subject_avg_gpa': cohort.get('avg_gpa', 2.0),
+            'subject_total_students': cohort.get('total_students', 0),
+        }
+        return prereq_features, cohort_features
+    
+    def _predict_with_subjects(
+        self, 
+        student_id: int, 
+        target_subject_code: str,
+        student_subjects: Dict[str, StudentSubject],
+        precomputed_ml: Optional[any] = None,
+        analysis: Optional[Tuple] = None,
+        student_features: Optional[Dict] = None
+    ) -> SubjectPrediction:
+        """Internal prediction method that accepts pre-fetched student subjects and optional precomputed ML prediction"""
+        if analysis is None:
+            analysis = self._analyze_prereqs(target_subject_code, student_subjects)
+        prereqs, prereq_performance, missing_prereqs, weighted_prereq_gpa, total_weight = analysis
         
         # Get cohort stats for context
         cohort = self.cohort_stats.get(target_subject_code, {})
@@ -430,14 +563,7 @@ class SubjectPredictionService:
                 success_prob = success_prob * 0.7 + difficulty_factor * 0.3
             
             # Determine risk level
-            if weighted_prereq_gpa >= RISK_THRESHOLDS['low']:
-                risk_level = 'low'
-            elif weighted_prereq_gpa >= RISK_THRESHOLDS['medium']:
-                risk_level = 'medium'
-            elif weighted_prereq_gpa >= RISK_THRESHOLDS['high']:
-                risk_level = 'high'
-            else:
-                risk_level = 'very_high'
+            risk_level = RISK_NAMES[bisect_right(RISK_BINS, weighted_prereq_gpa)]
         
         # Adjust for missing prereqs
         if missing_prereqs:
@@ -456,28 +582,14 @@ class SubjectPredictionService:
         # Use precomputed ML result if provided (batch mode), otherwise compute individually
         ml_pred = precomputed_ml
         
-        if ml_pred is None and self.ml_service and self.ml_service.is_available():
-            # Calculate student performance features (with caching)
-            student_features = self._get_cached_student_performance(student_id, student_subjects)
-            
-            # Prepare prerequisite features for ML
-            prereq_features = {
-                'num_prerequisites': len(prereqs),
-                'num_prerequisites_completed': len(prereq_performance),
-                'num_prerequisites_missing': len(missing_prereqs),
-                'avg_prereq_grade_points': np.mean([p.grade_points for p in prereq_performance]) if prereq_performance else 0.0,
-                'weighted_prereq_gpa': weighted_prereq_gpa,
-                'min_prereq_grade': min([p.grade_points for p in prereq_performance]) if prereq_performance else 0.0,
-                'max_prereq_grade': max([p.grade_points for p in prereq_performance]) if prereq_performance else 0.0,
-            }
+        if ml_pred is None and self._ml_ready:
+            # Calculate student performance features (with caching) unless passed in
+            if student_features is None:
+                student_features = self._get_cached_student_performance(student_id)
             
-            # Prepare cohort features for ML
-            cohort_features = {
-                'subject_pass_rate': cohort_pass_rate if cohort_pass_rate is not None else 0.5,
-                'subject_avg_score': cohort_avg_score if cohort_avg_score is not None else 50.0,
-                'subject_avg_gpa': cohort.get('avg_gpa', 2.0),
-                'subject_total_students': cohort.get('total_students', 0),
-            }
+            prereq_features, cohort_features = self._ml_features(
+                prereqs, prereq_performance, missing_prereqs, weighted_prereq_gpa, cohort
+            )
             
             # Get ML prediction
             ml_pred = self.ml_service.predict(
@@ -516,14 +628,14 @@ class SubjectPredictionService:
             risk_level=risk_level,
             predicted_success_probability=min(max(success_prob, 0.0), 1.0),
             weighted_prereq_gpa=weighted_prereq_gpa,
-            prereq_performance=prereq_performance,
-            missing_prereqs=missing_prereqs,
+            prereq_performance=tuple(prereq_performance),
+            missing_prereqs=tuple(missing_prereqs),
             recommendation=recommendation,
             cohort_pass_rate=cohort_pass_rate,
             cohort_avg_score=cohort_avg_score,
             ml_probability=ml_probability,
             ml_confidence=ml_confidence,
-            ml_top_factors=ml_top_factors,
+            ml_top_factors=tuple(ml_top_factors) if ml_top_factors is not None else None,
             prediction_method=prediction_method
         )
     
@@ -572,62 +684,37 @@ class SubjectPredictionService:
         student_id: int, 
         target_subject_codes: List[str]
     ) -> StudentPredictionReport:
-        """Predict success for multiple subjects (optimized with batch inference and caching)"""
-        
+        """Predict success for multiple subjects (optimized with batch inference and caching).
+        The returned report is shared with later callers through the cache and is immutable.
+        """
+        # Reports are deterministic for the loaded data; order of targets is part of the key
+        return self._get_report(student_id, tuple(target_subject_codes))
+    
+    def _build_report(
+        self,
+        student_id: int,
+        target_subject_codes: Tuple[str, ...]
+    ) -> StudentPredictionReport:
+        """Build the prediction report for predict_multiple_subjects (cached as _get_report)"""
         # Fetch student subjects once for all predictions (cached)
         student_subjects = self._get_student_subjects(student_id)
         
-        # Calculate current GPA
-        gpas = [s['grade_points'] for s in student_subjects.values() if s['grade_points'] is not None]
-        current_gpa = np.mean(gpas) if gpas else 0.0
+        # Use cached student performance features (includes current GPA)
+        student_features = self._get_cached_student_performance(student_id)
+        current_gpa = student_features['current_gpa']
         
-        # Use cached student performance features
-        student_features = self._get_cached_student_performance(student_id, student_subjects)
+        # Match prerequisites once per target; shared by the ML features and the rule-based score
+        analyses = [self._analyze_prereqs(code, student_subjects) for code in target_subject_codes]
         
         # Batch ML inference if available
         ml_predictions_map = {}
-        if self.ml_service and self.ml_service.is_available():
+        if self._ml_ready:
             batch_data = []
-            for code in target_subject_codes:
-                prereqs = SUBJECT_PREREQUISITES.get(code, [])
-                
-                # Calculate prereq features
-                prereq_performance = []
-                missing_prereqs = []
-                total_weighted_score = 0.0
-                total_weight = 0.0
-                
-                for prereq_code, weight in prereqs:
-                    if prereq_code in student_subjects:
-                        subj = student_subjects[prereq_code]
-                        gp = subj['grade_points']
-                        if gp is not None:
-                            prereq_performance.append((prereq_code, gp, weight))
-                            total_weighted_score += gp * weight
-                            total_weight += weight
-                    else:
-                        missing_prereqs.append(prereq_code)
-                
-                weighted_prereq_gpa = total_weighted_score / total_weight if total_weight > 0 else 0.0
-                
-                prereq_features = {
-                    'num_prerequisites': len(prereqs),
-                    'num_prerequisites_completed': len(prereq_performance),
-                    'num_prerequisites_missing': len(missing_prereqs),
-                    'avg_prereq_grade_points': np.mean([p[1] for p in prereq_performance]) if prereq_performance else 0.0,
-                    'weighted_prereq_gpa': weighted_prereq_gpa,
-                    'min_prereq_grade': min([p[1] for p in prereq_performance]) if prereq_performance else 0.0,
-                    'max_prereq_grade': max([p[1] for p in prereq_performance]) if prereq_performance else 0.0,
-                }
-                
-                cohort = self.cohort_stats.get(code, {})
-                cohort_features = {
-                    'subject_pass_rate': cohort.get('pass_rate') if cohort.get('pass_rate') is not None else 0.5,
-                    'subject_avg_score': cohort.get('avg_score') if cohort.get('avg_score') is not None else 50.0,
-                    'subject_avg_gpa': cohort.get('avg_gpa', 2.0),
-                    'subject_total_students': cohort.get('total_students', 0),
-                }
-                
+            for code, (prereqs, prereq_performance, missing_prereqs, weighted_prereq_gpa, _) in zip(target_subject_codes, analyses):
+                prereq_features, cohort_features = self._ml_features(
+                    prereqs, prereq_performance, missing_prereqs, weighted_prereq_gpa,
+                    self.cohort_stats.get(code, {})
+                )
                 batch_data.append({
                     'student_features': student_features,
                     'prereq_features': prereq_features,
@@ -641,32 +728,36 @@ class SubjectPredictionService:
         
         # Generate predictions with pre-computed ML results
         predictions = []
-        for code in target_subject_codes:
+        for code, analysis in zip(target_subject_codes, analyses):
             pred = self._predict_with_subjects(
                 student_id, code, student_subjects, 
-                precomputed_ml=ml_predictions_map.get(code)
+                precomputed_ml=ml_predictions_map.get(code),
+                analysis=analysis,
+                student_features=student_features
             )
             predictions.append(pred)
         
         # Identify high-risk subjects
-        high_risk = [p.subject_code for p in predictions if p.risk_level in ('high', 'very_high')]
+        high_risk = tuple(p.subject_code for p in predictions if p.risk_level in ('high', 'very_high'))
         
-        # Recommend order (lower risk first)
-        risk_order = {'low': 0, 'medium': 1, 'high': 2, 'very_high': 3, 'unknown': 1}
-        sorted_preds = sorted(predictions, key=lambda p: risk_order.get(p.risk_level, 2))
-        recommended_order = [p.subject_code for p in sorted_preds]
+        # Recommend order (lower risk first); stable sort on precomputed ranks
+        ranks = [RISK_ORDER.get(p.risk_level, 2) for p in predictions]
+        recommended_order = tuple(predictions[i].subject_code for i in sorted(range(len(ranks)), key=ranks.__getitem__))
         
         return StudentPredictionReport(
             student_id=student_id,
             current_gpa=current_gpa,
-            predictions=predictions,
+            predictions=tuple(predictions),
             high_risk_subjects=high_risk,
             recommended_order=recommended_order
         )
     
     def get_prerequisite_chain(self, subject_code: str) -> Dict:
-        """Get the full prerequisite chain for a subject"""
-        prereqs = SUBJECT_PREREQUISITES.get(subject_code, [])
+        """Get the full prerequisite chain for a subject (a copy; the cached chain is never handed out)"""
+        cached = self._chain_cache.get(subject_code)
+        if cached is not None:
+            return self._copy_chain(cached)
+        
         chain = {
             'subject_code': subject_code,
             'subject_name': self.cohort_stats.get(subject_code, {}).get('subject_name', subject_code),
@@ -674,15 +765,15 @@ class SubjectPredictionService:
             'full_chain': []
         }
         
-        visited = set()
-        
-        def traverse(code: str, depth: int = 0):
-            if code in visited or depth > 5:
-                return
-            visited.add(code)
-            
-            prereq_list = SUBJECT_PREREQUISITES.get(code, [])
-            for prereq_code, weight in prereq_list:
+        # Breadth-first walk; each prerequisite is listed once at its shallowest depth
+        visited = {subject_code}
+        queue = deque([(subject_code, 0)])
+        while queue:
+            code, depth = queue.popleft()
+            for prereq_code, weight in SUBJECT_PREREQUISITES.get(code, ()):
+                if prereq_code in visited:
+                    continue
+                visited.add(prereq_code)
                 prereq_name = self.cohort_stats.get(prereq_code, {}).get('subject_name', prereq_code)
                 
                 if depth == 0:
@@ -697,12 +788,23 @@ class SubjectPredictionService:
                     'name': prereq_name,
                     'depth': depth + 1
                 })
-                
-                traverse(prereq_code, depth + 1)
+                queue.append((prereq_code, depth + 1))
         
-        traverse(subject_code)
+        # Only known subjects are cached so arbitrary codes can't grow the cache
+        if subject_code in SUBJECT_PREREQUISITES:
+            self._chain_cache[subject_code] = chain
+            return self._copy_chain(chain)
         return chain
     
+    @staticmethod
+    def _copy_chain(chain: Dict) -> Dict:
+        """Copy a prerequisite chain down to its entry dicts"""
+        return {
+            **chain,
+            'direct_prerequisites': [dict(p) for p in chain['direct_prerequisites']],
+            'full_chain': [dict(p) for p in chain['full_chain']]
+        }
+    
     def predict_subject_success(
         self, 
         student_id: int, 
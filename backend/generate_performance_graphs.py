@@ -7,42 +7,55 @@ This script generates comprehensive visualizations for the prediction model:
 - F1-scores
 - ROC-AUC curve
 - Confusion Matrix
+
+All panels are rendered into a single dashboard.png; pass --split to also
+write each panel as its own PNG.
 """
 
 import pandas as pd
 import numpy as np
+import sys
+import hashlib
 import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
+from joblib import Memory
 from pathlib import Path
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import (
-    classification_report,
-    confusion_matrix,
-    roc_curve,
-    auc,
-    precision_recall_curve,
-    accuracy_score,
-    precision_score,
-    recall_score,
-    f1_score,
-    roc_auc_score
-)
-
-# Set style for publication-quality graphs
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (10, 6)
-plt.rcParams['font.size'] = 11
-plt.rcParams['axes.labelsize'] = 12
-plt.rcParams['axes.titlesize'] = 14
-plt.rcParams['xtick.labelsize'] = 10
-plt.rcParams['ytick.labelsize'] = 10
-plt.rcParams['legend.fontsize'] = 10
 
 # Paths
 DATA_DIR = Path(__file__).parent / 'data'
 MODELS_DIR = Path(__file__).parent / 'models'
 OUTPUT_DIR = Path(__file__).parent / 'performance_graphs'
+MODEL_PATH = MODELS_DIR / 'random_forest_model.pkl'
+TEST_IDX_PATH = MODELS_DIR / 'test_idx.npy'  # written by analysis/train_random_forest.py
+SAVE_DPI = 150  # PNG encode time and size grow with dpi squared; 150 is plenty for reports
+
+# Prediction cache for re-runs that only change plotting
+memory = Memory(Path(__file__).parent / '.cache', verbose=0)
+
+# matplotlib/seaborn are imported on first plot, not at startup
+_plot_libs = None
+
+
+def _plotting():
+    """Import and style matplotlib/seaborn once; returns (plt, sns)"""
+    global _plot_libs
+    if _plot_libs is None:
+        import matplotlib
+        matplotlib.use('Agg')  # headless: no GUI backend needed to write PNGs
+        import matplotlib.pyplot as plt
+        plt.ioff()
+        import seaborn as sns
+        
+        # Set style for publication-quality graphs
+        sns.set_style("whitegrid")
+        plt.rcParams['figure.figsize'] = (10, 6)
+        plt.rcParams['font.size'] = 11
+        plt.rcParams['axes.labelsize'] = 12
+        plt.rcParams['axes.titlesize'] = 14
+        plt.rcParams['xtick.labelsize'] = 10
+        plt.rcParams['ytick.labelsize'] = 10
+        plt.rcParams['legend.fontsize'] = 10
+        _plot_libs = (plt, sns)
+    return _plot_libs
 
 # Create output directory
 OUTPUT_DIR.mkdir(exist_ok=True)
@@ -53,9 +66,9 @@ def load_model_and_data():
     print("Loading model and data...")
     
     # Load model
-    model_path = MODELS_DIR / 'random_forest_model.pkl'
-    model = joblib.load(model_path)
-    print(f"✓ Model loaded: {model_path}")
+    # Memory-map the tree arrays instead of copying them out of the pickle
+    model = joblib.load(MODEL_PATH, mmap_mode='r')
+    print(f"✓ Model loaded: {MODEL_PATH}")
     
     # Load label encoders
     encoders_path = MODELS_DIR / 'label_encoders.pkl'
@@ -72,240 +85,207 @@ def load_model_and_data():
     
     # Load training data
     data_path = DATA_DIR / 'ml_training_data.csv'
-    df = pd.read_csv(data_path)
+    df = read_training_data(data_path, feature_columns)
     print(f"✓ Data loaded: {len(df):,} records")
     
     return model, label_encoders, feature_columns, df
 
 
+def read_training_data(data_path, feature_columns):
+    """Read only the columns evaluation needs, from a Parquet copy of the CSV when one is current"""
+    wanted = set(feature_columns) | {'passed', 'subject_code', 'programme_code', 'gender'}
+    header = pd.read_csv(data_path, nrows=0).columns
+    usecols = [c for c in header if c in wanted]
+    
+    parquet_path = data_path.with_suffix('.parquet')
+    if parquet_path.exists() and parquet_path.stat().st_mtime >= data_path.stat().st_mtime:
+        try:
+            return pd.read_parquet(parquet_path, engine='pyarrow', columns=usecols)
+        except Exception:
+            pass  # unreadable cache: rebuild below
+    
+    try:
+        df = pd.read_csv(data_path, engine='pyarrow')
+    except ImportError:
+        return pd.read_csv(data_path, usecols=usecols)
+    try:
+        # All columns are stored so a changed feature set can still be served from the copy
+        df.to_parquet(parquet_path, engine='pyarrow', compression='zstd', index=False)
+    except Exception:
+        pass  # read-only data dir: parse the CSV again next run
+    return df[usecols]
+
+
+def encode_labels(values, encoder):
+    """LabelEncoder.transform as a single hash-map lookup over the column"""
+    mapping = {cls: i for i, cls in enumerate(encoder.classes_)}
+    codes = values.map(mapping)
+    if codes.isna().any():
+        unseen = values[codes.isna()].unique()[:5]
+        raise ValueError(f"y contains previously unseen labels: {list(unseen)}")
+    return codes.to_numpy(dtype=np.int32)
+
+
 def prepare_test_data(df, label_encoders, feature_columns):
     """Prepare test dataset"""
     print("\nPreparing test data...")
     
     # Encode categorical features
     if 'programme_code' in df.columns and 'programme_code' in label_encoders:
-        df['programme_code_encoded'] = label_encoders['programme_code'].transform(
-            df['programme_code'].fillna('UNKNOWN')
+        df['programme_code_encoded'] = encode_labels(
+            df['programme_code'].fillna('UNKNOWN'), label_encoders['programme_code']
         )
     
     if 'gender' in df.columns and 'gender' in label_encoders:
-        df['gender_encoded'] = label_encoders['gender'].transform(
-            df['gender'].fillna('UNKNOWN')
+        df['gender_encoded'] = encode_labels(
+            df['gender'].fillna('UNKNOWN'), label_encoders['gender']
         )
     
-    df['subject_code_encoded'] = label_encoders['subject_code'].transform(df['subject_code'])
+    df['subject_code_encoded'] = encode_labels(df['subject_code'], label_encoders['subject_code'])
     
     # Prepare features and target
     X = df[feature_columns].fillna(0)
-    y = df['passed'].astype(int)
-    
-    # Use same random state as training for consistent split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    y = df['passed'].astype(np.uint8)  # 0/1 labels: one byte per sample
+    
+    if TEST_IDX_PATH.exists():
+        # Exact test rows saved at training time
+        test_idx = np.load(TEST_IDX_PATH)
+        X_test, y_test = X.iloc[test_idx], y.iloc[test_idx]
+    else:
+        # Use same random state as training for consistent split
+        from sklearn.model_selection import train_test_split
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=y
+        )
     
+    pos = int(y_test.sum())
+    neg = len(y_test) - pos
     print(f"✓ Test set: {len(X_test):,} samples")
-    print(f"  - Pass: {y_test.sum():,} ({y_test.sum()/len(y_test)*100:.1f}%)")
-    print(f"  - Fail: {(~y_test.astype(bool)).sum():,} ({(~y_test.astype(bool)).sum()/len(y_test)*100:.1f}%)")
+    print(f"  - Pass: {pos:,} ({pos/len(y_test)*100:.1f}%)")
+    print(f"  - Fail: {neg:,} ({neg/len(y_test)*100:.1f}%)")
     
-    return X_test, y_test
+    # The trees compare in float32; converting once here saves a float64 copy for
+    # hashing and the cast inside predict_proba (column names are kept)
+    return X_test.astype(np.float32), y_test
 
 
-def generate_confusion_matrix(y_test, y_pred, output_dir):
-    """Generate confusion matrix heatmap"""
-    print("\n📊 Generating Confusion Matrix...")
-    
-    cm = confusion_matrix(y_test, y_pred)
-    
-    plt.figure(figsize=(8, 6))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', cbar=True,
+def binary_confusion_matrix(y_true, y_pred):
+    """2x2 confusion matrix for 0/1 labels via one bincount pass"""
+    y_true = np.asarray(y_true).astype(np.uint8, copy=False)
+    y_pred = np.asarray(y_pred).astype(np.uint8, copy=False)
+    return np.bincount((y_true << 1) | y_pred, minlength=4).reshape(2, 2)
+
+
+def plot_confusion_matrix(ax, cm, accuracy):
+    """Confusion matrix heatmap"""
+    _, sns = _plotting()
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', cbar=True, ax=ax,
                 xticklabels=['Fail (0)', 'Pass (1)'],
                 yticklabels=['Fail (0)', 'Pass (1)'])
-    plt.title('Confusion Matrix - Subject Success Prediction', fontsize=14, fontweight='bold')
-    plt.ylabel('Actual Class', fontsize=12)
-    plt.xlabel('Predicted Class', fontsize=12)
-    
-    # Add accuracy text
-    accuracy = accuracy_score(y_test, y_pred)
-    plt.text(1, -0.3, f'Overall Accuracy: {accuracy*100:.2f}%', 
-             ha='center', fontsize=11, fontweight='bold')
-    
-    plt.tight_layout()
-    output_path = output_dir / 'confusion_matrix.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved: {output_path}")
-    plt.close()
+    ax.set_title('Confusion Matrix - Subject Success Prediction', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Actual Class', fontsize=12)
+    # Accuracy goes under the axis label so it stays inside the panel
+    ax.set_xlabel(f'Predicted Class\nOverall Accuracy: {accuracy*100:.2f}%', fontsize=12)
 
 
-def generate_roc_curve(y_test, y_proba, output_dir):
-    """Generate ROC curve"""
-    print("\n📊 Generating ROC Curve...")
-    
-    fpr, tpr, thresholds = roc_curve(y_test, y_proba)
+def plot_roc_curve(ax, fpr, tpr):
+    """ROC curve; returns the ROC-AUC"""
+    from sklearn.metrics import auc
     roc_auc = auc(fpr, tpr)
     
-    plt.figure(figsize=(10, 8))
-    plt.plot(fpr, tpr, color='#2c5364', lw=2.5, 
-             label=f'ROC Curve (AUC = {roc_auc:.4f})')
-    plt.plot([0, 1], [0, 1], color='gray', lw=2, linestyle='--', 
-             label='Random Classifier (AUC = 0.5000)')
-    
-    plt.xlim([0.0, 1.0])
-    plt.ylim([0.0, 1.05])
-    plt.xlabel('False Positive Rate', fontsize=12)
-    plt.ylabel('True Positive Rate', fontsize=12)
-    plt.title('ROC Curve - Subject Success Prediction Model', fontsize=14, fontweight='bold')
-    plt.legend(loc="lower right", fontsize=11)
-    plt.grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    output_path = output_dir / 'roc_curve.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved: {output_path}")
-    print(f"  ROC-AUC Score: {roc_auc:.4f}")
-    plt.close()
+    ax.plot(fpr, tpr, color='#2c5364', lw=2.5, 
+            label=f'ROC Curve (AUC = {roc_auc:.4f})')
+    ax.plot([0, 1], [0, 1], color='gray', lw=2, linestyle='--', 
+            label='Random Classifier (AUC = 0.5000)')
+    
+    ax.set_xlim([0.0, 1.0])
+    ax.set_ylim([0.0, 1.05])
+    ax.set_xlabel('False Positive Rate', fontsize=12)
+    ax.set_ylabel('True Positive Rate', fontsize=12)
+    ax.set_title('ROC Curve - Subject Success Prediction Model', fontsize=14, fontweight='bold')
+    ax.legend(loc="lower right", fontsize=11)
+    ax.grid(True, alpha=0.3)
+    return roc_auc
 
 
-def generate_precision_recall_curve(y_test, y_proba, output_dir):
-    """Generate Precision-Recall curve"""
-    print("\n📊 Generating Precision-Recall Curve...")
-    
-    precision, recall, thresholds = precision_recall_curve(y_test, y_proba)
+def plot_precision_recall_curve(ax, precision, recall):
+    """Precision-Recall curve; returns the PR-AUC"""
+    from sklearn.metrics import auc
     pr_auc = auc(recall, precision)
     
-    plt.figure(figsize=(10, 8))
-    plt.plot(recall, precision, color='#0f0c29', lw=2.5,
-             label=f'PR Curve (AUC = {pr_auc:.4f})')
-    
-    plt.xlim([0.0, 1.0])
-    plt.ylim([0.0, 1.05])
-    plt.xlabel('Recall', fontsize=12)
-    plt.ylabel('Precision', fontsize=12)
-    plt.title('Precision-Recall Curve', fontsize=14, fontweight='bold')
-    plt.legend(loc="lower left", fontsize=11)
-    plt.grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    output_path = output_dir / 'precision_recall_curve.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved: {output_path}")
-    print(f"  PR-AUC Score: {pr_auc:.4f}")
-    plt.close()
+    ax.plot(recall, precision, color='#0f0c29', lw=2.5,
+            label=f'PR Curve (AUC = {pr_auc:.4f})')
+    
+    ax.set_xlim([0.0, 1.0])
+    ax.set_ylim([0.0, 1.05])
+    ax.set_xlabel('Recall', fontsize=12)
+    ax.set_ylabel('Precision', fontsize=12)
+    ax.set_title('Precision-Recall Curve', fontsize=14, fontweight='bold')
+    ax.legend(loc="lower left", fontsize=11)
+    ax.grid(True, alpha=0.3)
+    return pr_auc
 
 
-def generate_metrics_comparison(y_test, y_pred, output_dir):
-    """Generate bar chart comparing Precision, Recall, F1-Score per class"""
-    print("\n📊 Generating Metrics Comparison Chart...")
-    
-    from sklearn.metrics import precision_recall_fscore_support
-    
-    precision, recall, f1, support = precision_recall_fscore_support(
-        y_test, y_pred, labels=[0, 1]
-    )
-    
-    # Create DataFrame for plotting
+def plot_metrics_by_class(ax, precision, recall, f1):
+    """Bar chart comparing Precision, Recall, F1-Score per class"""
     metrics_df = pd.DataFrame({
         'Fail (Class 0)': [precision[0], recall[0], f1[0]],
         'Pass (Class 1)': [precision[1], recall[1], f1[1]]
     }, index=['Precision', 'Recall', 'F1-Score'])
     
-    # Plot
-    ax = metrics_df.plot(kind='bar', figsize=(10, 6), width=0.7, 
-                         color=['#ff6b6b', '#51cf66'])
-    plt.title('Classification Metrics by Class', fontsize=14, fontweight='bold')
-    plt.ylabel('Score', fontsize=12)
-    plt.xlabel('Metric', fontsize=12)
-    plt.ylim([0, 1.0])
-    plt.xticks(rotation=0)
-    plt.legend(title='Class', fontsize=10)
-    plt.grid(axis='y', alpha=0.3)
+    metrics_df.plot(kind='bar', ax=ax, width=0.7, color=['#ff6b6b', '#51cf66'])
+    ax.set_title('Classification Metrics by Class', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Score', fontsize=12)
+    ax.set_xlabel('Metric', fontsize=12)
+    ax.set_ylim([0, 1.0])
+    ax.tick_params(axis='x', rotation=0)
+    ax.legend(title='Class', fontsize=10)
+    ax.grid(axis='y', alpha=0.3)
     
     # Add value labels on bars
     for container in ax.containers:
         ax.bar_label(container, fmt='%.3f', padding=3)
-    
-    plt.tight_layout()
-    output_path = output_dir / 'metrics_by_class.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved: {output_path}")
-    
-    # Print metrics
-    print("\n  Metrics per class:")
-    print(f"  Fail (0) - Precision: {precision[0]:.3f}, Recall: {recall[0]:.3f}, F1: {f1[0]:.3f}")
-    print(f"  Pass (1) - Precision: {precision[1]:.3f}, Recall: {recall[1]:.3f}, F1: {f1[1]:.3f}")
-    plt.close()
 
 
-def generate_overall_metrics(y_test, y_pred, y_proba, output_dir):
-    """Generate overall performance metrics visualization"""
-    print("\n📊 Generating Overall Metrics Dashboard...")
-    
-    # Calculate metrics
-    accuracy = accuracy_score(y_test, y_pred)
-    precision_macro = precision_score(y_test, y_pred, average='macro')
-    recall_macro = recall_score(y_test, y_pred, average='macro')
-    f1_macro = f1_score(y_test, y_pred, average='macro')
-    roc_auc = roc_auc_score(y_test, y_proba)
-    
-    # Create figure
-    fig, axes = plt.subplots(1, 5, figsize=(18, 4))
-    metrics = [accuracy, precision_macro, recall_macro, f1_macro, roc_auc]
+def plot_overall_metrics(ax, overall):
+    """One bar per overall metric"""
     labels = ['Accuracy', 'Precision\n(Macro)', 'Recall\n(Macro)', 'F1-Score\n(Macro)', 'ROC-AUC']
     colors = ['#0f0c29', '#302b63', '#24243e', '#5f2c82', '#2c5364']
-    
-    for ax, metric, label, color in zip(axes, metrics, labels, colors):
-        ax.bar([0], [metric], color=color, width=0.6)
-        ax.set_ylim([0, 1.0])
-        ax.set_ylabel('Score', fontsize=10)
-        ax.set_title(label, fontsize=11, fontweight='bold')
-        ax.set_xticks([])
-        ax.text(0, metric + 0.02, f'{metric:.4f}', ha='center', fontsize=11, fontweight='bold')
-        ax.grid(axis='y', alpha=0.3)
-    
-    plt.suptitle('Overall Model Performance Metrics', fontsize=14, fontweight='bold', y=1.02)
-    plt.tight_layout()
-    
-    output_path = output_dir / 'overall_metrics.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved: {output_path}")
-    print(f"\n  Overall Metrics:")
-    print(f"  Accuracy:        {accuracy:.4f}")
-    print(f"  Precision (avg): {precision_macro:.4f}")
-    print(f"  Recall (avg):    {recall_macro:.4f}")
-    print(f"  F1-Score (avg):  {f1_macro:.4f}")
-    print(f"  ROC-AUC:         {roc_auc:.4f}")
-    plt.close()
-
-
-def generate_feature_importance(model, feature_columns, output_dir, top_n=15):
-    """Generate feature importance chart"""
-    print(f"\n📊 Generating Feature Importance Chart (Top {top_n})...")
-    
-    feature_importance = pd.DataFrame({
-        'feature': feature_columns,
-        'importance': model.feature_importances_
-    }).sort_values('importance', ascending=False)
-    
-    top_features = feature_importance.head(top_n)
-    
-    plt.figure(figsize=(10, 8))
-    plt.barh(range(len(top_features)), top_features['importance'], 
-             color=plt.cm.viridis(np.linspace(0.3, 0.9, len(top_features))))
-    plt.yticks(range(len(top_features)), top_features['feature'])
-    plt.xlabel('Importance Score', fontsize=12)
-    plt.ylabel('Feature', fontsize=12)
-    plt.title(f'Top {top_n} Most Important Features', fontsize=14, fontweight='bold')
-    plt.gca().invert_yaxis()
-    plt.grid(axis='x', alpha=0.3)
-    
-    plt.tight_layout()
-    output_path = output_dir / 'feature_importance.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved: {output_path}")
-    plt.close()
-
-
-def generate_summary_report(y_test, y_pred, y_proba, output_dir):
+    values = list(overall.values())
+    
+    ax.bar(range(len(values)), values, color=colors, width=0.6)
+    ax.set_ylim([0, 1.0])
+    ax.set_ylabel('Score', fontsize=10)
+    ax.set_xticks(range(len(values)))
+    ax.set_xticklabels(labels)
+    ax.set_title('Overall Model Performance Metrics', fontsize=14, fontweight='bold')
+    for i, metric in enumerate(values):
+        ax.text(i, metric + 0.02, f'{metric:.4f}', ha='center', fontsize=11, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+
+
+def plot_feature_importance(ax, model, feature_columns, top_n=15):
+    """Horizontal bar chart of the top_n feature importances"""
+    plt, _ = _plotting()
+    importance = model.feature_importances_
+    
+    # Select the top_n without sorting every feature, then order just those
+    top_n = min(top_n, len(importance))
+    top_idx = np.argpartition(-importance, top_n - 1)[:top_n]
+    top_idx = top_idx[np.argsort(-importance[top_idx], kind='stable')]
+    
+    ax.barh(range(top_n), importance[top_idx], 
+            color=plt.cm.viridis(np.linspace(0.3, 0.9, top_n)))
+    ax.set_yticks(range(top_n))
+    ax.set_yticklabels(np.asarray(feature_columns)[top_idx])
+    ax.set_xlabel('Importance Score', fontsize=12)
+    ax.set_ylabel('Feature', fontsize=12)
+    ax.set_title(f'Top {top_n} Most Important Features', fontsize=14, fontweight='bold')
+    ax.invert_yaxis()
+    ax.grid(axis='x', alpha=0.3)
+
+
+def generate_summary_report(y_test, y_pred, overall, cm, output_dir):
     """Generate text summary report"""
     print("\n📝 Generating Summary Report...")
     
@@ -315,8 +295,10 @@ def generate_summary_report(y_test, y_pred, y_proba, output_dir):
                                    target_names=['Fail (0)', 'Pass (1)'],
                                    digits=4)
     
-    accuracy = accuracy_score(y_test, y_pred)
-    roc_auc = roc_auc_score(y_test, y_proba)
+    accuracy = overall['accuracy']
+    roc_auc = overall['roc_auc']
+    pos = int(y_test.sum())
+    neg = len(y_test) - pos
     
     summary = f"""
 PERFORMANCE EVALUATION SUMMARY
@@ -324,8 +306,8 @@ PERFORMANCE EVALUATION SUMMARY
 
 Dataset Statistics:
   Total Test Samples: {len(y_test):,}
-  Actual Pass: {y_test.sum():,} ({y_test.sum()/len(y_test)*100:.2f}%)
-  Actual Fail: {(~y_test.astype(bool)).sum():,} ({(~y_test.astype(bool)).sum()/len(y_test)*100:.2f}%)
+  Actual Pass: {pos:,} ({pos/len(y_test)*100:.2f}%)
+  Actual Fail: {neg:,} ({neg/len(y_test)*100:.2f}%)
 
 Overall Metrics:
   Accuracy:  {accuracy:.4f} ({accuracy*100:.2f}%)
@@ -335,7 +317,7 @@ Classification Report:
 {report}
 
 Confusion Matrix:
-{confusion_matrix(y_test, y_pred)}
+{cm}
 
 Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}
 """
@@ -348,8 +330,22 @@ Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}
     print(summary)
 
 
+@memory.cache(ignore=['model', 'X'])
+def _predict_proba(model_mtime, xhash, model, X):
+    """model.predict_proba, cached on (model file mtime, test-set hash)"""
+    return model.predict_proba(X)
+
+
 def main():
     """Main execution function"""
+    split = '--split' in sys.argv[1:]
+    from sklearn.metrics import (
+        roc_curve,
+        precision_recall_curve,
+        precision_recall_fscore_support,
+        roc_auc_score
+    )
+    
     print("="*70)
     print("GENERATING PERFORMANCE GRAPHS FOR ML MODEL")
     print("="*70)
@@ -360,37 +356,86 @@ def main():
     # Prepare test data
     X_test, y_test = prepare_test_data(df, label_encoders, feature_columns)
     
-    # Make predictions
+    # Make predictions (hard labels follow from the probabilities, as in predict)
     print("\n🔮 Making predictions...")
-    y_pred = model.predict(X_test)
-    y_proba = model.predict_proba(X_test)[:, 1]
+    xhash = hashlib.sha1(np.ascontiguousarray(X_test.to_numpy())).hexdigest()
+    proba = _predict_proba(MODEL_PATH.stat().st_mtime, xhash, model, X_test)
+    y_pred = model.classes_[proba.argmax(axis=1)]
+    y_proba = proba[:, 1]
     print(f"✓ Predictions complete")
     
-    # Generate all visualizations
+    # Metrics shared by the panels and the summary, computed once
+    cm = binary_confusion_matrix(y_test, y_pred)
+    precision, recall, f1, _ = precision_recall_fscore_support(y_test, y_pred, labels=[0, 1])
+    # Macro averages and accuracy follow from the per-class scores and the matrix
+    overall = {
+        'accuracy': np.trace(cm) / cm.sum(),
+        'precision_macro': precision.mean(),
+        'recall_macro': recall.mean(),
+        'f1_macro': f1.mean(),
+        'roc_auc': roc_auc_score(y_test, y_proba),
+    }
+    fpr, tpr, _ = roc_curve(y_test, y_proba)
+    pr_precision, pr_recall, _ = precision_recall_curve(y_test, y_proba)
+    
+    # Each panel: (file name for --split, figure size, draw function)
+    panels = [
+        ('confusion_matrix.png', (8, 6), lambda ax: plot_confusion_matrix(ax, cm, overall['accuracy'])),
+        ('roc_curve.png', (10, 8), lambda ax: plot_roc_curve(ax, fpr, tpr)),
+        ('precision_recall_curve.png', (10, 8), lambda ax: plot_precision_recall_curve(ax, pr_precision, pr_recall)),
+        ('metrics_by_class.png', (10, 6), lambda ax: plot_metrics_by_class(ax, precision, recall, f1)),
+        ('overall_metrics.png', (12, 5), lambda ax: plot_overall_metrics(ax, overall)),
+        ('feature_importance.png', (10, 8), lambda ax: plot_feature_importance(ax, model, feature_columns)),
+    ]
+    
     print("\n" + "="*70)
     print("GENERATING VISUALIZATIONS")
     print("="*70)
     
-    generate_confusion_matrix(y_test, y_pred, OUTPUT_DIR)
-    generate_roc_curve(y_test, y_proba, OUTPUT_DIR)
-    generate_precision_recall_curve(y_test, y_proba, OUTPUT_DIR)
-    generate_metrics_comparison(y_test, y_pred, OUTPUT_DIR)
-    generate_overall_metrics(y_test, y_pred, y_proba, OUTPUT_DIR)
-    generate_feature_importance(model, feature_columns, OUTPUT_DIR)
-    generate_summary_report(y_test, y_pred, y_proba, OUTPUT_DIR)
+    plt, _ = _plotting()
+    
+    # One figure, one PNG encode for all panels
+    fig, axes = plt.subplots(3, 2, figsize=(20, 22), constrained_layout=True)
+    for (_, _, draw), ax in zip(panels, axes.flat):
+        draw(ax)
+    fig.suptitle('Subject Success Prediction - Model Performance', fontsize=16, fontweight='bold')
+    output_path = OUTPUT_DIR / 'dashboard.png'
+    fig.savefig(output_path, dpi=SAVE_DPI)
+    plt.close(fig)
+    print(f"✓ Saved: {output_path}")
+    
+    if split:
+        for name, figsize, draw in panels:
+            fig, ax = plt.subplots(figsize=figsize)
+            draw(ax)
+            fig.tight_layout()
+            output_path = OUTPUT_DIR / name
+            fig.savefig(output_path, dpi=SAVE_DPI, bbox_inches='tight')
+            plt.close(fig)
+            print(f"✓ Saved: {output_path}")
+    
+    print("\n  Metrics per class:")
+    print(f"  Fail (0) - Precision: {precision[0]:.3f}, Recall: {recall[0]:.3f}, F1: {f1[0]:.3f}")
+    print(f"  Pass (1) - Precision: {precision[1]:.3f}, Recall: {recall[1]:.3f}, F1: {f1[1]:.3f}")
+    print(f"\n  Overall Metrics:")
+    print(f"  Accuracy:        {overall['accuracy']:.4f}")
+    print(f"  Precision (avg): {overall['precision_macro']:.4f}")
+    print(f"  Recall (avg):    {overall['recall_macro']:.4f}")
+    print(f"  F1-Score (avg):  {overall['f1_macro']:.4f}")
+    print(f"  ROC-AUC:         {overall['roc_auc']:.4f}")
+    
+    generate_summary_report(y_test, y_pred, overall, cm, OUTPUT_DIR)
     
     print("\n" + "="*70)
     print("✅ ALL GRAPHS GENERATED SUCCESSFULLY!")
     print("="*70)
     print(f"\n📁 Output directory: {OUTPUT_DIR.absolute()}")
     print("\nGenerated files:")
-    print("  1. confusion_matrix.png")
-    print("  2. roc_curve.png")
-    print("  3. precision_recall_curve.png")
-    print("  4. metrics_by_class.png")
-    print("  5. overall_metrics.png")
-    print("  6. feature_importance.png")
-    print("  7. performance_summary.txt")
+    print("  - dashboard.png")
+    if split:
+        for name, _, _ in panels:
+            print(f"  - {name}")
+    print("  - performance_summary.txt")
     print("\n✨ Ready for your report!")
 
 
@@ -1,41 +1,36 @@
 """
-Startup script that initializes gevent for Cassandra driver
-before starting the FastAPI application.
+Startup script for the FastAPI application.
 
-This is necessary for Python 3.13+ compatibility where asyncore was removed.
+The Cassandra driver uses its asyncio reactor (AsyncioConnection), so no
+gevent monkey patching is needed on Python 3.13+ where asyncore was removed.
 """
 import os
-import sys
 
-# Use gevent as the event loop for cassandra-driver (Python 3.13 compatible)
-try:
-    from gevent import monkey
-    monkey.patch_all()
-    print("✓ Gevent monkey patching applied for Cassandra driver")
-except ImportError:
-    print("Warning: gevent not found, trying asyncio reactor...")
-    # Fallback to asyncio
-    os.environ['CASSANDRA_DRIVER_EVENT_LOOP'] = 'asyncio'
-    import cassandra.io.asyncioreactor
-    cassandra.io.asyncioreactor.AsyncioConnection.initialize_reactor()
-    print("✓ Cassandra asyncio reactor initialized")
-
-# Now we can safely import the application
 from app.main import app
 
 # Now run uvicorn with the app object directly (not string import)
 if __name__ == "__main__":
     import uvicorn
     
+    # Each worker loads its own copy of the data and model, so scaling out is opt-in
+    workers = int(os.getenv("UV_WORKERS", "1"))
+    
     print("Starting PathFinder Backend API...")
     print("API: http://localhost:9000")
     print("Docs: http://localhost:9000/docs")
+    if workers > 1:
+        print(f"Workers: {workers}")
     print("")
     
     uvicorn.run(
-        app,  # Pass the app object directly, not as a string
+        # Multiple workers re-import the app in each process, which needs the import string
+        "app.main:app" if workers > 1 else app,
         host="0.0.0.0",
         port=9000,
+        workers=workers,
+        # "auto" already picks uvloop/httptools (uvicorn[standard]) and falls back on Windows
+        loop="auto",
+        http="auto",
         reload=False,  # Disable reload to avoid event loop re-initialization issues
         log_level="info"
     )
@@ -34,6 +34,7 @@ def test_academic_planner(student_id: int, intake: str = "202301", entry_type: s
         print(f"❌ Student {student_id} not found in CSV!")
         return
     
+    completed_set = frozenset(completed_codes)
     print(f"✅ Found {len(completed_codes)} completed subjects")
     print(f"   Sample codes: {completed_codes[:5]}")
     
@@ -52,7 +53,7 @@ def test_academic_planner(student_id: int, intake: str = "202301", entry_type: s
     
     # Step 3: Compute progress
     print("\nStep 3: Computing progress...")
-    progress = variant.compute_progress(set(completed_codes))
+    progress = variant.compute_progress(completed_set)
     
     print(f"✅ Progress computed:")
     print(f"   Completed credits: {progress.completed_credits}/{progress.total_credits}")
@@ -85,7 +86,7 @@ def test_academic_planner(student_id: int, intake: str = "202301", entry_type: s
             group = variant.elective_groups[placeholder_code]
             for course in group.options:
                 # Check if prerequisites are met
-                prereqs_met = all(prereq in completed_codes for prereq in course.prerequisites)
+                prereqs_met = completed_set.issuperset(course.prerequisites)
                 if prereqs_met and not course.is_placeholder:
                     elective_subjects.append({
                         'code': course.subject_code,
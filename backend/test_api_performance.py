@@ -1,13 +1,23 @@
 """
 Diagnostic script to test API endpoint performance and identify bottlenecks
+
+Each group of endpoints is first warmed up with concurrent requests (so lazy
+first-request initialisation is not counted), then timed one request at a time.
 """
-import requests
+import asyncio
+import httpx
 import time
 import sys
 
 BASE_URL = "http://localhost:8000"
 
-def test_endpoint(name, url, headers=None, timeout=30):
+
+async def warm_up(client, urls, headers=None):
+    """Hit every URL once, concurrently, and ignore the results"""
+    await asyncio.gather(*(client.get(url, headers=headers) for url in urls), return_exceptions=True)
+
+
+async def test_endpoint(client, name, url, headers=None):
     """Test a single endpoint and measure performance"""
     print(f"\n{'='*70}")
     print(f"Testing: {name}")
@@ -15,12 +25,12 @@ def test_endpoint(name, url, headers=None, timeout=30):
     print(f"{'='*70}")
     
     try:
-        start_time = time.time()
+        start_time = time.perf_counter()
         print(f"⏱️  Starting request at {time.strftime('%H:%M:%S')}")
         
-        response = requests.get(url, headers=headers, timeout=timeout)
+        response = await client.get(url, headers=headers)
         
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         
         print(f"✅ Status Code: {response.status_code}")
         print(f"⏱️  Response Time: {elapsed:.3f} seconds")
@@ -52,14 +62,26 @@ def test_endpoint(name, url, headers=None, timeout=30):
             
         return elapsed
         
-    except requests.Timeout:
-        print(f"❌ REQUEST TIMED OUT after {timeout} seconds")
+    except httpx.TimeoutException:
+        print(f"❌ REQUEST TIMED OUT after {client.timeout.read} seconds")
         return None
     except Exception as e:
         print(f"❌ ERROR: {str(e)}")
         return None
 
 
+async def run_tests(endpoints, headers=None, timeout=30):
+    """Warm up all endpoints concurrently, then time each one sequentially"""
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        print(f"\n🔥 Warming up {len(endpoints)} endpoint(s)...")
+        await warm_up(client, [url for _, _, url in endpoints], headers=headers)
+        
+        results = {}
+        for key, name, url in endpoints:
+            results[key] = await test_endpoint(client, name, url, headers=headers)
+        return results
+
+
 def main():
     print("="*70)
     print("API Performance Diagnostic Tool")
@@ -68,7 +90,7 @@ def main():
     
     # Check if server is running
     try:
-        response = requests.get(f"{BASE_URL}/api/health", timeout=5)
+        response = httpx.get(f"{BASE_URL}/api/health", timeout=5)
         if response.status_code == 200:
             print("✅ Backend server is running")
         else:
@@ -83,25 +105,17 @@ def main():
     print("\n💡 Note: Some endpoints require authentication.")
     print("   Testing public endpoints first...\n")
     
-    results = {}
-    
-    # Test 1: List variants (should be fast - cached)
-    results['variants'] = test_endpoint(
-        "List Variants",
-        f"{BASE_URL}/api/catalogue/variants"
-    )
-    
-    # Test 2: Get electives (this might be slow)
-    results['electives'] = test_endpoint(
-        "Get Electives for 202301-normal",
-        f"{BASE_URL}/api/catalogue/variant/202301-normal/electives"
-    )
-    
-    # Test 3: Get all courses (for comparison)
-    results['courses'] = test_endpoint(
-        "Get All Courses for 202301-normal",
-        f"{BASE_URL}/api/catalogue/variant/202301-normal/courses"
-    )
+    results = asyncio.run(run_tests([
+        # Test 1: List variants (should be fast - cached)
+        ('variants', "List Variants",
+         f"{BASE_URL}/api/catalogue/variants"),
+        # Test 2: Get electives (this might be slow)
+        ('electives', "Get Electives for 202301-normal",
+         f"{BASE_URL}/api/catalogue/variant/202301-normal/electives"),
+        # Test 3: Get all courses (for comparison)
+        ('courses', "Get All Courses for 202301-normal",
+         f"{BASE_URL}/api/catalogue/variant/202301-normal/courses"),
+    ]))
     
     # If you have a valid token, test authenticated endpoints
     token = input("\n🔑 Enter your auth token (or press Enter to skip authenticated tests): ").strip()
@@ -109,19 +123,14 @@ def main():
     if token:
         headers = {"Authorization": f"Bearer {token}"}
         
-        # Test 4: Student progress
-        results['student_progress'] = test_endpoint(
-            "Get Student Progress",
-            f"{BASE_URL}/api/catalogue/student/progress?intake=202301&entry_type=normal",
-            headers=headers
-        )
-        
-        # Test 5: Student stats
-        results['student_stats'] = test_endpoint(
-            "Get Student Stats",
-            f"{BASE_URL}/api/students/stats",
-            headers=headers
-        )
+        results.update(asyncio.run(run_tests([
+            # Test 4: Student progress
+            ('student_progress', "Get Student Progress",
+             f"{BASE_URL}/api/catalogue/student/progress?intake=202301&entry_type=normal"),
+            # Test 5: Student stats
+            ('student_stats', "Get Student Stats",
+             f"{BASE_URL}/api/students/stats"),
+        ], headers=headers)))
     
     # Summary
     print("\n" + "="*70)
@@ -2,6 +2,7 @@
 Test script to compare performance of batch inference vs individual predictions
 """
 import time
+import timeit
 import sys
 from pathlib import Path
 
@@ -31,19 +32,21 @@ def test_performance():
     print(f"Subjects: {', '.join(test_subjects)}")
     print()
     
+    # Build the lazily computed cohort stats and run one untimed prediction up front,
+    # so Test 1 does not absorb the one-off warm-up cost
+    service.cohort_stats
+    service.predict_multiple_subjects(test_student_id, test_subjects)
+    
     # Clear caches for fair comparison
-    if hasattr(service, '_student_cache'):
-        service._student_cache.clear()
-    if hasattr(service, '_student_perf_cache'):
-        service._student_perf_cache.clear()
+    service.clear_student_caches()
     
     # Test 1: Batch inference (optimized with caching)
     print("🚀 Test 1: Batch Inference (with caching)")
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     report = service.predict_multiple_subjects(test_student_id, test_subjects)
     
-    batch_time = time.time() - start_time
+    batch_time = time.perf_counter() - start_time
     print(f"   Time: {batch_time:.4f} seconds")
     print(f"   Predictions: {len(report.predictions)}")
     print(f"   Method: {report.predictions[0].prediction_method if report.predictions else 'N/A'}")
@@ -57,19 +60,18 @@ def test_performance():
     print()
     
     # Clear caches again
-    service._student_cache.clear()
-    service._student_perf_cache.clear()
+    service.clear_student_caches()
     
     # Test 2: Individual predictions (old way)
     print("🐌 Test 2: Individual Predictions (no batch)")
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     predictions = []
     for subject_code in test_subjects:
         pred = service.predict_subject_success(test_student_id, subject_code)
         predictions.append(pred)
     
-    individual_time = time.time() - start_time
+    individual_time = time.perf_counter() - start_time
     print(f"   Time: {individual_time:.4f} seconds")
     print(f"   Predictions: {len(predictions)}")
     print()
@@ -96,17 +98,19 @@ def test_performance():
     print("=" * 70)
     
     # First call (cache miss)
-    start_time = time.time()
+    start_time = time.perf_counter()
     report1 = service.predict_multiple_subjects(test_student_id, test_subjects)
-    first_call_time = time.time() - start_time
+    first_call_time = time.perf_counter() - start_time
     
-    # Second call (cache hit)
-    start_time = time.time()
-    report2 = service.predict_multiple_subjects(test_student_id, test_subjects)
-    second_call_time = time.time() - start_time
+    # Cache hit: a single call takes microseconds, so report the best of 5 runs of 100 calls
+    hit_times = timeit.repeat(
+        lambda: service.predict_multiple_subjects(test_student_id, test_subjects),
+        number=100, repeat=5
+    )
+    second_call_time = min(hit_times) / 100
     
-    print(f"First call (cache miss):  {first_call_time:.4f}s")
-    print(f"Second call (cache hit):  {second_call_time:.4f}s")
+    print(f"First call (cache miss):  {first_call_time*1e6:.1f}µs")
+    print(f"Second call (cache hit):  {second_call_time*1e6:.1f}µs per call")
     
     if second_call_time < first_call_time:
         cache_speedup = first_call_time / second_call_time
@@ -121,53 +125,19 @@ def test_performance():
         print("🤖 ML Model: Batch vs Individual Inference")
         print("=" * 70)
         
-        # Prepare test data
+        # Prepare test data with the service's own prerequisite matching and feature
+        # builders, so the batch matches what predict_multiple_subjects sends
         student_subjects = service._get_student_subjects(test_student_id)
-        student_features = service._get_cached_student_performance(test_student_id, student_subjects)
-        
-        from app.services.subject_prediction_service import SUBJECT_PREREQUISITES
-        import numpy as np
+        student_features = service._get_cached_student_performance(test_student_id)
         
         batch_data = []
         for code in test_subjects:
-            prereqs = SUBJECT_PREREQUISITES.get(code, [])
-            
-            prereq_performance = []
-            missing_prereqs = []
-            total_weighted_score = 0.0
-            total_weight = 0.0
-            
-            for prereq_code, weight in prereqs:
-                if prereq_code in student_subjects:
-                    subj = student_subjects[prereq_code]
-                    gp = subj['grade_points']
-                    if gp is not None:
-                        prereq_performance.append((prereq_code, gp, weight))
-                        total_weighted_score += gp * weight
-                        total_weight += weight
-                else:
-                    missing_prereqs.append(prereq_code)
-            
-            weighted_prereq_gpa = total_weighted_score / total_weight if total_weight > 0 else 0.0
-            
-            prereq_features = {
-                'num_prerequisites': len(prereqs),
-                'num_prerequisites_completed': len(prereq_performance),
-                'num_prerequisites_missing': len(missing_prereqs),
-                'avg_prereq_grade_points': np.mean([p[1] for p in prereq_performance]) if prereq_performance else 0.0,
-                'weighted_prereq_gpa': weighted_prereq_gpa,
-                'min_prereq_grade': min([p[1] for p in prereq_performance]) if prereq_performance else 0.0,
-                'max_prereq_grade': max([p[1] for p in prereq_performance]) if prereq_performance else 0.0,
-            }
-            
-            cohort = service.cohort_stats.get(code, {})
-            cohort_features = {
-                'subject_pass_rate': cohort.get('pass_rate') if cohort.get('pass_rate') is not None else 0.5,
-                'subject_avg_score': cohort.get('avg_score') if cohort.get('avg_score') is not None else 50.0,
-                'subject_avg_gpa': cohort.get('avg_gpa', 2.0),
-                'subject_total_students': cohort.get('total_students', 0),
-            }
-            
+            prereqs, prereq_performance, missing_prereqs, weighted_prereq_gpa, _ = \
+                service._analyze_prereqs(code, student_subjects)
+            prereq_features, cohort_features = service._ml_features(
+                prereqs, prereq_performance, missing_prereqs, weighted_prereq_gpa,
+                service.cohort_stats.get(code, {})
+            )
             batch_data.append({
                 'student_features': student_features,
                 'prereq_features': prereq_features,
@@ -175,13 +145,18 @@ def test_performance():
                 'subject_code': code
             })
         
+        # Discarded warm-up of both paths so neither timing pays first-call setup
+        # (ONNX bindings are allocated per batch-size bucket on first use)
+        service.ml_service.predict_batch(batch_data)
+        service.ml_service.predict(**batch_data[0])
+        
         # Test batch inference
-        start_time = time.time()
+        start_time = time.perf_counter()
         batch_results = service.ml_service.predict_batch(batch_data)
-        ml_batch_time = time.time() - start_time
+        ml_batch_time = time.perf_counter() - start_time
         
         # Test individual inference
-        start_time = time.time()
+        start_time = time.perf_counter()
         individual_results = []
         for data in batch_data:
             result = service.ml_service.predict(
@@ -191,7 +166,7 @@ def test_performance():
                 subject_code=data['subject_code']
             )
             individual_results.append(result)
-        ml_individual_time = time.time() - start_time
+        ml_individual_time = time.perf_counter() - start_time
         
         print(f"ML Batch inference:       {ml_batch_time:.4f}s")
         print(f"ML Individual predictions: {ml_individual_time:.4f}s")